@@ -1,11 +1,11 @@
 """Module for mixins used in all apps"""
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.shortcuts import redirect
-from django.core.exceptions import ObjectDoesNotExist
 
 from posts.constants import POST_ID
 from users.constants import USER_ID, GET_USER_PROFILE_URL
 from users.models import Post
+from utils.identity_map import get_identity_map
 
 
 class AccessRequiredMixin(UserPassesTestMixin):
@@ -22,21 +22,32 @@ class AccessRequiredMixin(UserPassesTestMixin):
 
 
 class PostAccessMixin(AccessRequiredMixin):
-    """Denies access to page if user does not own the post"""
+    """Denies access to page if user does not own the post
+
+    Post is loaded once: post found by the permission check is
+    stored in request identity map and returned by get_object.
+    """
+    def get_post_queryset(self):
+        """Returns queryset the post is loaded from"""
+        return Post.objects.all()
+
     def test_func(self):
         """Checks if user owns the post"""
-        access = super().test_func()
-
-        try:
-            # Check, if post exists
-            post = Post.objects.get(id=self.kwargs.get(POST_ID))
-        except ObjectDoesNotExist:
+        if not super().test_func():
             return False
 
-        # Check if the post belongs to the user
-        post_owner = post.user == self.request.user
-
-        # Return True if user have access and owns the post, else return False
-        return access and post_owner
+        # Post is found only if it exists and belongs to the user
+        post = self.get_post_queryset().filter(id=self.kwargs.get(POST_ID),
+                                               user_id=self.request.user.id).first()
+        if post is None:
+            return False
 
+        get_identity_map(self.request).add(post)
+        return True
 
+    def get_object(self, queryset=None):
+        """Returns post loaded by the permission check"""
+        post = get_identity_map(self.request).get(Post, self.kwargs.get(POST_ID))
+        if post is None:
+            return super().get_object(queryset)
+        return post
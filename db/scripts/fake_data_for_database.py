@@ -5,6 +5,8 @@ import requests
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.conf import settings
 from faker import Faker
+
+from db.scripts.helper_functions import like_unlike_object
 from users.models import User, Post, Image
 
 fake = Faker()
@@ -96,7 +98,7 @@ def generate_likes():
         # get random users to like the post
         users = User.objects.order_by("?")[:random.randrange(20)]
         for user in users:
-            post.likes.add(user)
+            like_unlike_object(post, user)
 
 
 generate_data()
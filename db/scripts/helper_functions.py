@@ -1,16 +1,54 @@
 """Module contains functions related to database"""
-from typing import Union
+from typing import Iterable, Tuple, Type, Union
 
-from django.shortcuts import get_object_or_404
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 
 from users.models import Post, Image, User
 
+# Toggles like in one statement: like row is deleted if it exists, otherwise
+# inserted (concurrent insert of the same like is ignored by ON CONFLICT),
+# then likes count is changed by the number of inserted/deleted rows
+# (never below zero, even if the count has drifted).
+# Returns new like state and likes count.
+TOGGLE_LIKE_SQL = """
+    WITH deleted AS (
+        DELETE FROM {likes_table}
+        WHERE {object_column} = %(object_id)s AND {user_column} = %(user_id)s
+        RETURNING 1
+    ), inserted AS (
+        INSERT INTO {likes_table} ({object_column}, {user_column})
+        SELECT %(object_id)s, %(user_id)s
+        WHERE NOT EXISTS (SELECT 1 FROM deleted)
+        ON CONFLICT ({object_column}, {user_column}) DO NOTHING
+        RETURNING 1
+    ), delta AS (
+        SELECT (SELECT COUNT(*) FROM inserted) - (SELECT COUNT(*) FROM deleted) AS value
+    )
+    UPDATE {object_table}
+    SET likes_count = GREATEST(likes_count + delta.value, 0){version_changes}
+    FROM delta
+    WHERE id = %(object_id)s
+    RETURNING NOT EXISTS (SELECT 1 FROM deleted), likes_count
+"""
+
+# Post likes count is displayed in cached post card, so post version is changed with it
+POST_VERSION_CHANGES_SQL = """,
+        version = version + (delta.value <> 0)::int,
+        updated_at = CASE WHEN delta.value = 0 THEN updated_at ELSE NOW() END"""
+
 
 def like_unlike_object(instance: Union[Post, Image],
                        user: User) -> bool:
     """Like/unlike object
 
-    Allows authenticated user like/unlike specific object
+    Allows authenticated user like/unlike specific object.
+    Denormalized likes count of the object is updated with the like,
+    new value is set to instance 'likes_count' field.
+
+    In PostgreSQL like is toggled by single statement, so concurrent
+    clicks of the same user can't create duplicate like or wrong count.
 
     Args:
         instance: Either image or post instance
@@ -19,14 +57,113 @@ def like_unlike_object(instance: Union[Post, Image],
     Returns:
         True if object is liked, else return False
     """
-    liked = False
-    # Check if user liked the target object yet
-    if instance.likes.filter(id=user.id).exists():
+    if connection.vendor == "postgresql":
+        return _toggle_like_in_single_statement(instance, user)
+
+    likes = instance.likes
+    like_filter = {likes.source_field_name: instance, likes.target_field_name: user}
+
+    with transaction.atomic():
         # if target object is liked -> unlike
-        instance.likes.remove(user)
-    else:
-        # if target object is unliked -> like
-        instance.likes.add(user)
-        liked = True
+        deleted, _ = likes.through.objects.filter(**like_filter).delete()
+        liked = not deleted
+        delta = -deleted
+        if liked:
+            # if target object is unliked -> like
+            _, created = likes.through.objects.get_or_create(**like_filter)
+            delta = int(created)
+
+        if delta:
+            counters = {"likes_count": Greatest(F("likes_count") + delta, 0)}
+            if isinstance(instance, Post):
+                # Post likes count is displayed in cached post card
+                counters.update(Post.get_version_changes())
+            type(instance).objects.filter(id=instance.id).update(**counters)
+
+    instance.refresh_from_db(fields=["likes_count"])
+    return liked
+
+
+def _toggle_like_in_single_statement(instance: Union[Post, Image], user: User) -> bool:
+    """Toggles like with TOGGLE_LIKE_SQL
+
+    Args:
+        instance: Either image or post instance
+        user: authenticated user that likes/unlikes object
+
+    Returns:
+        True if object is liked, else return False
+    """
+    likes = instance.likes
+    through_meta = likes.through._meta
+    sql = TOGGLE_LIKE_SQL.format(
+        likes_table=connection.ops.quote_name(through_meta.db_table),
+        object_column=connection.ops.quote_name(through_meta.get_field(likes.source_field_name).column),
+        user_column=connection.ops.quote_name(through_meta.get_field(likes.target_field_name).column),
+        object_table=connection.ops.quote_name(instance._meta.db_table),
+        version_changes=POST_VERSION_CHANGES_SQL if isinstance(instance, Post) else "",
+    )
 
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"object_id": instance.id, "user_id": user.id})
+        row = cursor.fetchone()
+
+    if row is None:
+        raise type(instance).DoesNotExist
+    liked, instance.likes_count = row
     return liked
+
+
+def like_unlike_objects(model: Union[Type[Post], Type[Image]],
+                        user: User,
+                        like_ids: Iterable[int],
+                        unlike_ids: Iterable[int]) -> Tuple[dict, set]:
+    """Like and unlike many objects of the same model
+
+    Likes are inserted and deleted with one statement each, likes counts
+    of all changed objects are updated with one statement per direction.
+    Objects are locked until the end of transaction, so concurrent
+    changes of the same objects are applied one after another.
+
+    Args:
+        model: either Post or Image
+        user: authenticated user that likes/unlikes objects
+        like_ids: ids of objects that should be liked
+        unlike_ids: ids of objects that should not be liked
+
+    Returns:
+        Dictionary {object_id: (liked, likes_count)} for existing objects
+        and set of ids of objects that were not liked before
+    """
+    likes = model.likes.through
+    object_field = model.likes.field.m2m_field_name()
+    user_field = model.likes.field.m2m_reverse_field_name()
+    user_likes = likes.objects.filter(**{user_field: user})
+
+    with transaction.atomic():
+        # Lock objects, missing objects are skipped
+        existing_ids = set(model.objects.select_for_update().filter(id__in={*like_ids, *unlike_ids})
+                           .order_by("id").values_list("id", flat=True))
+        like_ids = set(like_ids) & existing_ids
+        unlike_ids = (set(unlike_ids) & existing_ids) - like_ids
+
+        liked_ids = set(user_likes.filter(**{f"{object_field}__in": like_ids | unlike_ids})
+                        .values_list(object_field, flat=True))
+        added_ids = like_ids - liked_ids
+        removed_ids = unlike_ids & liked_ids
+
+        likes.objects.bulk_create([likes(**{f"{object_field}_id": object_id, f"{user_field}_id": user.id})
+                                   for object_id in added_ids], ignore_conflicts=True)
+        user_likes.filter(**{f"{object_field}__in": removed_ids}).delete()
+
+        for changed_ids, delta in ((added_ids, 1), (removed_ids, -1)):
+            if changed_ids:
+                counters = {"likes_count": Greatest(F("likes_count") + delta, 0)}
+                if model is Post:
+                    # Post likes count is displayed in cached post card
+                    counters.update(Post.get_version_changes())
+                model.objects.filter(id__in=changed_ids).update(**counters)
+
+        likes_counts = model.objects.filter(id__in=existing_ids).values_list("id", "likes_count")
+        states = {object_id: (object_id in like_ids, count) for object_id, count in likes_counts}
+    return states, added_ids
@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangogramm.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django setup, as it uses models
+from notify.stream import NotificationsStreamRouter  # noqa: E402
+
+# Notifications stream is served by plain ASGI application, other requests by Django
+application = NotificationsStreamRouter(django_application)
@@ -157,6 +157,11 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Base url to serve media files
 MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
+# Storage of uploaded images: "cloudinary" or "local" (files in MEDIA_ROOT).
+# Local storage is used if Cloudinary is not configured, e.g. in tests.
+MEDIA_STORAGE = os.environ.get("MEDIA_STORAGE", "cloudinary" if os.environ.get("CLOUDINARY_CLOUD_NAME") else "local")
 
 # Email settings
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -166,9 +171,42 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 
+# Cache used for rendered post cards.
+# Local memory cache is used by default, it is not shared between processes.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    },
+    # Values which are invalidated on change (e.g. unread notifications counts)
+    # must be shared by all worker processes, so process-local cache can't be used.
+    # Database cache table is created by notify migration,
+    # Redis or Memcached can be set by environment variables instead.
+    "notifications": {
+        "BACKEND": os.environ.get("NOTIFICATIONS_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.environ.get("NOTIFICATIONS_CACHE_LOCATION", "notifications_cache"),
+    },
+}
+
 # Paginator value
 PAGINATE_BY = 10
 
+# Background tasks (e.g. image uploads) run in a thread pool of each process.
+# In eager mode tasks run in the calling thread, it is used in tests.
+BACKGROUND_WORKERS = int(os.environ.get("BACKGROUND_WORKERS", 4))
+BACKGROUND_TASKS_EAGER = os.environ.get("BACKGROUND_TASKS_EAGER", "") == "1"
+# Uploaded images are downscaled and re-encoded in a process pool,
+# in eager mode they are processed in the calling process
+IMAGE_PROCESSING_WORKERS = int(os.environ.get("IMAGE_PROCESSING_WORKERS", os.cpu_count() or 1))
+
+# Broker of notification events pushed to notifications stream.
+# In-process broker delivers events to connections of the same process only,
+# broker shared by all workers is needed for several ASGI workers.
+NOTIFICATIONS_BROKER = os.environ.get("NOTIFICATIONS_BROKER", "notify.broker.InMemoryBroker")
+# Notifications stream is served only by ASGI application (djangogramm.asgi),
+# pages connect to it only if the site is deployed with ASGI server
+NOTIFICATIONS_STREAM_ENABLED = os.environ.get("NOTIFICATIONS_STREAM_ENABLED", "") == "1"
+
 # django-taggit is case insensitive
 TAGGIT_CASE_INSENSITIVE = True
 
@@ -66,4 +66,60 @@ $(document).ready(() => {
             }
         })
     });
-});
\ No newline at end of file
+});
+
+// Script for live unread notification count
+$(document).ready(() => {
+    const notificationsLink = $('#notifications-link');
+    const streamUrl = notificationsLink.data('stream-url');
+    if (!streamUrl || !window.EventSource) {
+        return;
+    }
+
+    // Browser reconnects automatically if connection is lost
+    const stream = new EventSource(streamUrl);
+    stream.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        let notificationCountElement = $('#notification-count');
+
+        // The latest notification is sent only when notifications are created
+        if (data.notification) {
+            const others = data.notification.other_actors_count;
+            const actors = others ? `${data.notification.actor} and ${others} other${others > 1 ? 's' : ''}`
+                : data.notification.actor;
+            notificationsLink.attr('title', `${actors} ${data.notification.verb}`);
+        }
+
+        if (data.unread_count === 0) {
+            notificationCountElement.remove();
+            return;
+        }
+        if (notificationCountElement.length === 0) {
+            notificationCountElement = $('<span class="badge rounded-pill bg-danger" id="notification-count"></span>');
+            notificationsLink.append(notificationCountElement);
+        }
+        notificationCountElement.text(data.unread_count);
+    };
+});
+
+
+// Script for mark all notifications as read button
+$(document).ready(() => {
+    $('#notifications-read-all').on('click', (event) => {
+        event.preventDefault();
+
+        const readAllLink = $(event.currentTarget);
+        const csrfToken = $('input[name="csrfmiddlewaretoken"]').val();
+
+        $.ajax({
+            url: readAllLink.data('href'),
+            type: 'POST',
+            headers: {'X-CSRFToken': csrfToken},
+            success: function (response) {
+                // All read buttons are removed with the unread counter
+                $('.notification-read').remove();
+                $('#notification-count').remove();
+            }
+        });
+    });
+});
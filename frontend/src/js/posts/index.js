@@ -50,3 +50,64 @@ function objectLikeUnlike(url, likesCountElement, likeIconElement) {
     });
 }
 
+
+// Script for infinite scroll of the feed, next pages are loaded
+// from feed JSON API and appended to the page
+$(document).ready(() => {
+    const feedElement = $('#feed-posts');
+    const feedApiUrl = feedElement.data('api-url');
+    let nextCursor = feedElement.data('next-cursor');
+    let loading = false;
+
+    if (!feedApiUrl) {
+        return;
+    }
+    $('#feed-pagination').hide();
+
+    $(window).on('scroll', () => {
+        const nearBottom = $(window).scrollTop() + $(window).height() > $(document).height() - 300;
+        if (!nearBottom || !nextCursor || loading) {
+            return;
+        }
+
+        loading = true;
+        $.ajax({
+            url: feedApiUrl,
+            type: 'GET',
+            data: {cursor: nextCursor},
+            success: function (response) {
+                response.results.forEach((post) => feedElement.append(renderPostCard(post)));
+                nextCursor = response.next_cursor;
+            },
+            complete: function () {
+                loading = false;
+            },
+        });
+    });
+});
+
+// Function builds feed post card from post JSON
+function renderPostCard(post) {
+    const imageColumn = $('<div class="col-md-3 col-sm-12">');
+    const postLink = $('<a>').attr('href', post.url).appendTo(imageColumn);
+    if (post.cover_image) {
+        $('<img>').attr('src', post.cover_image).appendTo(postLink);
+    }
+
+    const tags = $('<small class="text-muted">');
+    post.tags.forEach((tag) => tags.append($('<a>').attr('href', tag.url).text(`#${tag.name}`), ' '));
+
+    const contentColumn = $('<div class="col-md-9 col-sm-12">').append(
+        $('<p>').text(post.content),
+        $('<p>').append(tags),
+        $('<p>').append($('<a>').attr('href', post.author.url)
+            .append($('<small class="text-muted">').text(`by ${post.author.full_name}`))),
+        $('<p>').append($('<small class="text-muted">').text(`${post.likes_count} likes`)),
+        $('<p>').append($('<small class="text-muted">').text(new Date(post.created_at).toLocaleString())),
+    );
+
+    return [
+        $('<div class="row py-2">').append(imageColumn, contentColumn),
+        $('<hr class="border-2 border-top">'),
+    ];
+}
@@ -0,0 +1,125 @@
+"""
+Module for publish/subscribe of notification events
+
+Events are published by notification changes (from request and background
+threads) and are consumed by notifications stream (in ASGI event loop).
+Broker class is selected by NOTIFICATIONS_BROKER setting, so in-process
+broker can be replaced by broker shared by all workers (e.g. Redis pub/sub).
+"""
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from notify.constants import SUBSCRIPTION_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Events of one user received by one connection"""
+
+    def __init__(self, broker: "Broker", user_id: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    async def get(self) -> dict:
+        """Waits for the next event"""
+        return await self.queue.get()
+
+    def put(self, event: dict):
+        """Adds event to the queue from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Event loop of the connection is closed
+            self.close()
+
+    def _put(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client doesn't read events, every event makes it recount notifications anyway
+            logger.warning(f"Notification event for user {self.user_id} is dropped")
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker(ABC):
+    """Base class of notification event brokers"""
+
+    @abstractmethod
+    def publish(self, user_ids: Iterable[int], event: dict):
+        """Sends event to all subscriptions of the users
+
+        Args:
+            user_ids: ids of users who receive the event
+            event: JSON serializable event
+        """
+
+    @abstractmethod
+    def subscribe(self, user_id: int) -> Subscription:
+        """Returns subscription to the events of the user, must be called in event loop
+
+        Args:
+            user_id: user id
+        """
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription):
+        """Stops delivery of events to the subscription
+
+        Args:
+            subscription: subscription returned by subscribe()
+        """
+
+
+class InMemoryBroker(Broker):
+    """
+    Delivers events to subscriptions of the current process only,
+    so it works with single ASGI worker
+    """
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def publish(self, user_ids: Iterable[int], event: dict):
+        with self.lock:
+            subscriptions = [subscription for user_id in user_ids
+                             for subscription in self.subscriptions.get(user_id, ())]
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(self, user_id)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            user_subscriptions = self.subscriptions.get(subscription.user_id, set())
+            user_subscriptions.discard(subscription)
+            if not user_subscriptions:
+                self.subscriptions.pop(subscription.user_id, None)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    """Returns broker of the process selected by NOTIFICATIONS_BROKER setting"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.NOTIFICATIONS_BROKER)()
+    return _broker
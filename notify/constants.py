@@ -1,4 +1,5 @@
 """Module for constants used in notify app"""
+from datetime import timedelta
 
 # Templates
 ALL_NOTIFICATIONS_TEMPLATE = "notify/notifications.html"
@@ -7,6 +8,10 @@ ALL_NOTIFICATIONS_TEMPLATE = "notify/notifications.html"
 NOTIFICATIONS_URL = "notify:all"
 NOTIFICATIONS_READ_URL = "notify:read"
 NOTIFICATIONS_DELETE_URL = "notify:delete"
+NOTIFICATIONS_READ_SELECTED_URL = "notify:read_selected"
+NOTIFICATIONS_READ_ALL_URL = "notify:read_all"
+NOTIFICATIONS_DELETE_SELECTED_URL = "notify:delete_selected"
+NOTIFICATIONS_API_URL = "notify:api"
 
 # Notification messages
 NOTIFY_NEW_POST = "created new post"
@@ -16,6 +21,7 @@ NOTIFY_LIKE_IMAGE = "liked your image"
 
 # Error messages
 NOTIFICATION_DOES_NOT_EXIST = "Notifications does not exist"
+INVALID_NOTIFICATION_IDS_MSG = "Expected JSON object with 'ids' list of at most {} notification ids"
 ERROR_WHILE_CREATING_POST_NOTIFICATIONS = "Could not create notifications when post with id {} was created"
 ERROR_WHILE_CREATING_LIKE_OBJECT_NOTIFICATION = "Could not create notification when {} with id {} was liked"
 ERROR_WHILE_DELETING_NOTIFICATION = "Could not delete notifications when related {} with id {} was deleted"
@@ -24,6 +30,56 @@ ERROR_WHILE_DELETING_NOTIFICATION = "Could not delete notifications when related
 TARGET_CONTENT_TYPE = "target_content_type"
 TARGET_OBJECT_ID = "target_object_id"
 VERB_MAX_LENGTH = 255
+# Fields of notification targets used in the notifications list
+TARGET_FIELDS = {
+    "post": ("id",),
+    "image": ("id", "post_id"),
+}
+# App label of the models which are targets of notifications
+NOTIFICATIONS_APP_LABEL = "users"
+# Number of notifications inserted with one statement
+NOTIFICATIONS_BATCH_SIZE = 1000
+
+# Notifications about the same activity performed to the same target
+# within this period are grouped into one notification
+NOTIFICATION_GROUP_WINDOW = timedelta(days=1)
+# Number of the latest distinct actors stored in grouped notification,
+# actors count is exact while the group has at most this number of actors
+NOTIFICATION_RECENT_ACTORS = 100
+
+# Monthly partitions of notifications table (PostgreSQL only)
+PARTITION_NAME = "{table}_p{year:04d}_{month:02d}"
+PARTITION_NAME_PATTERN = r"{table}_p(?P<year>\d{{4}})_(?P<month>\d{{2}})"
+DEFAULT_PARTITION_NAME = "{table}_default"
+# Number of months after the current one which partitions are created in advance
+PARTITIONS_AHEAD = 3
+
+# Retention of notifications
+# Notifications older than this number of days are removed
+NOTIFICATIONS_RETENTION_DAYS = 365
+# Read notifications older than this number of days are removed
+READ_NOTIFICATIONS_RETENTION_DAYS = 30
+# Number of read notifications deleted with one statement
+PRUNE_BATCH_SIZE = 10000
+
+# Cached count of unread notifications of the user, stored in cache shared by all workers
+UNREAD_COUNT_CACHE = "notifications"
+UNREAD_COUNT_CACHE_KEY = "notifications:unread:{}"
+# Cached count is recalculated at least once per this number of seconds
+UNREAD_COUNT_CACHE_TIMEOUT = 300
+
+# Server-sent events stream of notifications (served by ASGI application only)
+NOTIFICATIONS_STREAM_PATH = "/notifications/stream"
+# Number of seconds between keepalive comments sent to idle connection
+STREAM_KEEPALIVE_INTERVAL = 15
+# Maximum number of events waiting to be sent to one connection
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+# Maximum number of notifications selected in one request
+SELECTED_NOTIFICATIONS_LIMIT = 1000
+
+# Keys of cursor pagination of notifications
+NOTIFICATION_CURSOR_KEYS = ("timestamp", "id")
 
 # Number of a notifications displayed on the page
 NOTIFICATIONS_PER_PAGE = 20
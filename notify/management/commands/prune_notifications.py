@@ -0,0 +1,43 @@
+"""Management command for removing old notifications"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notify.constants import (
+    NOTIFICATIONS_RETENTION_DAYS, READ_NOTIFICATIONS_RETENTION_DAYS, PRUNE_BATCH_SIZE, PARTITIONS_AHEAD
+)
+from notify.models import Notification
+from notify.partitions import create_future_partitions, drop_partitions_before, is_partitioned
+
+
+class Command(BaseCommand):
+    help = ("Removes old notifications and read notifications older than retention period, "
+            "creates partitions of the next months. Should be run daily.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=NOTIFICATIONS_RETENTION_DAYS,
+                            help="Notifications older than this number of days are removed")
+        parser.add_argument("--read-days", type=int, default=READ_NOTIFICATIONS_RETENTION_DAYS,
+                            help="Read notifications older than this number of days are removed")
+        parser.add_argument("--batch-size", type=int, default=PRUNE_BATCH_SIZE,
+                            help="Number of notifications deleted with one statement")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options["days"])
+
+        table = Notification._meta.db_table
+        if is_partitioned(table):
+            create_future_partitions(table, PARTITIONS_AHEAD)
+            # Whole months of old notifications are dropped without row-by-row DELETE
+            for partition in drop_partitions_before(table, cutoff):
+                self.stdout.write(f"Dropped partition {partition}")
+
+        # Rows left in DEFAULT partition (or in not partitioned table) are deleted in batches
+        deleted = Notification.delete_older_than(cutoff, read_only=False, batch_size=options["batch_size"])
+        self.stdout.write(f"Deleted {deleted} old notifications")
+
+        deleted = Notification.delete_older_than(now - timedelta(days=options["read_days"]), read_only=True,
+                                                 batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} old read notifications"))
@@ -0,0 +1,124 @@
+# Generated by Django 4.1.7 on 2026-10-17 22:40
+
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import migrations
+from django.utils import timezone
+
+# Helpers and names are copied from notify.partitions and notify.constants,
+# so the migration doesn't depend on the current code of the app
+PARTITION_NAME = "{table}_p{year:04d}_{month:02d}"
+DEFAULT_PARTITION_NAME = "{table}_default"
+PARTITIONS_AHEAD = 3
+
+CREATE_PARTITION_SQL = """
+    CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table}
+    FOR VALUES FROM (%(start)s) TO (%(end)s)
+"""
+
+INDEXES_SQL = """
+    SELECT index.relname, pg_get_indexdef(index.oid)
+    FROM pg_index
+    JOIN pg_class index ON index.oid = pg_index.indexrelid
+    WHERE pg_index.indrelid = %s::regclass AND NOT pg_index.indisprimary
+"""
+
+FOREIGN_KEYS_SQL = """
+    SELECT conname, pg_get_constraintdef(oid)
+    FROM pg_constraint
+    WHERE conrelid = %s::regclass AND contype = 'f'
+"""
+
+
+def get_month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month_start: date, months: int) -> date:
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def month_bound(month_start: date) -> datetime:
+    return datetime(month_start.year, month_start.month, 1, tzinfo=dt_timezone.utc)
+
+
+def create_partitions(cursor, quote_name, table: str, first_month: date, last_month: date):
+    """Creates monthly partitions from first to last month, including both"""
+    month_start = first_month
+    while month_start <= last_month:
+        next_month = add_months(month_start, 1)
+        partition = PARTITION_NAME.format(table=table, year=month_start.year, month=month_start.month)
+        cursor.execute(CREATE_PARTITION_SQL.format(table=quote_name(table), partition=quote_name(partition)),
+                       {"start": month_bound(month_start), "end": month_bound(next_month)})
+        month_start = next_month
+
+
+def rebuild_table(schema_editor, table: str, partitioned: bool):
+    """
+    Recreates notifications table as partitioned by 'timestamp' or as plain table
+
+    Rows, indexes and foreign keys are copied to the new table with the
+    same names. Primary key of partitioned table must include partition
+    key, so it is (id, timestamp). 'id' is identity column (created by
+    Django 4.1), so it stays unique.
+    """
+    quote_name = schema_editor.connection.ops.quote_name
+    old_table = f"{table}_old"
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(INDEXES_SQL, [table])
+        indexes = cursor.fetchall()
+        cursor.execute(FOREIGN_KEYS_SQL, [table])
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT MIN("timestamp") FROM {quote_name(table)}')
+        first_timestamp = cursor.fetchone()[0] or timezone.now()
+
+        cursor.execute(f"ALTER TABLE {quote_name(table)} RENAME TO {quote_name(old_table)}")
+        cursor.execute(
+            f"CREATE TABLE {quote_name(table)} "
+            f"(LIKE {quote_name(old_table)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS)"
+            + (' PARTITION BY RANGE ("timestamp")' if partitioned else "")
+        )
+        if partitioned:
+            cursor.execute(f"CREATE TABLE {quote_name(DEFAULT_PARTITION_NAME.format(table=table))} "
+                           f"PARTITION OF {quote_name(table)} DEFAULT")
+            current_month = get_month_start(timezone.now())
+            create_partitions(cursor, quote_name, table, get_month_start(first_timestamp),
+                              add_months(current_month, PARTITIONS_AHEAD))
+
+        cursor.execute(f"INSERT INTO {quote_name(table)} OVERRIDING SYSTEM VALUE "
+                       f"SELECT * FROM {quote_name(old_table)}")
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) "
+                       f"FROM {quote_name(table)}", [table])
+        cursor.execute(f"DROP TABLE {quote_name(old_table)}")
+
+        primary_key = '(id, "timestamp")' if partitioned else "(id)"
+        cursor.execute(f"ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(f'{table}_pkey')} "
+                       f"PRIMARY KEY {primary_key}")
+        for _, index_definition in indexes:
+            cursor.execute(index_definition)
+        for name, constraint_definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(name)} "
+                           f"{constraint_definition}")
+
+
+def partition_notifications(apps, schema_editor):
+    """Partitions notifications table by month of 'timestamp' (PostgreSQL only)"""
+    if schema_editor.connection.vendor == "postgresql":
+        rebuild_table(schema_editor, apps.get_model("notify", "Notification")._meta.db_table, partitioned=True)
+
+
+def merge_notifications(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        rebuild_table(schema_editor, apps.get_model("notify", "Notification")._meta.db_table, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notify', '0002_notification_groups'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_notifications, merge_notifications),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:15
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    """
+    Creates tables of database caches (e.g. 'notifications' cache of unread
+    counts), so deployment doesn't need separate 'createcachetable' step.
+    Existing tables and caches with other backends are skipped.
+    """
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notify', '0004_notification_cursor_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -3,19 +3,59 @@ import logging
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models, OperationalError
+from django.core.cache import caches
+from django.db import connection, models, transaction, OperationalError
 from django.db.models import QuerySet
+from django.utils import timezone
 from reretry import retry
 
+from notify.broker import get_broker
 from notify.constants import (
     NOTIFICATION_DOES_NOT_EXIST, TARGET_CONTENT_TYPE, TARGET_OBJECT_ID,
-    VERB_MAX_LENGTH
+    VERB_MAX_LENGTH, NOTIFICATIONS_BATCH_SIZE, NOTIFICATIONS_APP_LABEL, UNREAD_COUNT_CACHE,
+    UNREAD_COUNT_CACHE_KEY, UNREAD_COUNT_CACHE_TIMEOUT, TARGET_FIELDS, NOTIFICATION_GROUP_WINDOW,
+    NOTIFICATION_RECENT_ACTORS
 )
 from users.constants import TRIES, DELAY
 from users.models import User
 
 logger = logging.getLogger(__name__)
 
+# Marks notifications of the recipient as read in one statement.
+# Subqueries of the main SELECT see the table before the UPDATE,
+# so counts after the change are calculated from the returned rows.
+# Returns number of changed rows, unread and total count after the change.
+MARK_AS_READ_SQL = """
+    WITH changed AS (
+        UPDATE {table} SET unread = false
+        WHERE recipient_id = %(recipient_id)s AND unread{ids_filter}
+        RETURNING unread
+    )
+    SELECT
+        (SELECT COUNT(*) FROM changed),
+        (SELECT COUNT(*) FROM {table} WHERE recipient_id = %(recipient_id)s AND unread)
+            - (SELECT COUNT(*) FROM changed),
+        (SELECT COUNT(*) FROM {table} WHERE recipient_id = %(recipient_id)s)
+"""
+
+# Deletes notifications of the recipient in one statement,
+# returns the same values as MARK_AS_READ_SQL
+DELETE_SQL = """
+    WITH changed AS (
+        DELETE FROM {table}
+        WHERE recipient_id = %(recipient_id)s{ids_filter}
+        RETURNING unread
+    )
+    SELECT
+        (SELECT COUNT(*) FROM changed),
+        (SELECT COUNT(*) FROM {table} WHERE recipient_id = %(recipient_id)s AND unread)
+            - (SELECT COUNT(*) FROM changed WHERE unread),
+        (SELECT COUNT(*) FROM {table} WHERE recipient_id = %(recipient_id)s)
+            - (SELECT COUNT(*) FROM changed)
+"""
+
+IDS_FILTER_SQL = " AND id = ANY(%(ids)s)"
+
 
 class Notification(models.Model):
     """
@@ -38,6 +78,13 @@ class Notification(models.Model):
     verb = models.CharField(max_length=VERB_MAX_LENGTH)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    # Notifications about the same activity performed to the same target
+    # are grouped, 'actor' is the latest actor of the group
+    actors_count = models.PositiveIntegerField(default=1)
+    # Ids of the latest distinct actors of the group, the latest first,
+    # at most NOTIFICATION_RECENT_ACTORS
+    recent_actors = models.JSONField(default=list, blank=True)
+
     recipient = models.ForeignKey(User,
                                   blank=False,
                                   related_name="notifications",
@@ -46,6 +93,11 @@ class Notification(models.Model):
     class Meta:
         ordering = ("-timestamp",)
         index_together = ("recipient", "unread")
+        indexes = [
+            models.Index(fields=["target_content_type", "target_object_id"], name="notifications_target_idx"),
+            # Cursor pagination of the user notifications
+            models.Index(fields=["recipient", "-timestamp", "-id"], name="notifications_recipient_ts_idx"),
+        ]
 
     @staticmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
@@ -58,6 +110,12 @@ class Notification(models.Model):
         """
         Creates multiple notifications
 
+        Content type is resolved once, recipient ids are streamed from
+        the database (server-side cursor in PostgreSQL) and notifications
+        are inserted with one multi-row INSERT per batch, so the number of
+        queries doesn't grow with the number of recipients. Notifications
+        are created in one transaction, so retry never duplicates them.
+
         Args:
             actor: the authenticated user that performed the activity
             target_content_type: type of the object to which the activity was performed
@@ -65,16 +123,27 @@ class Notification(models.Model):
             verb: phrase that identifies the action of the activity
             recipients: queryset with users that should be notified
         """
-        if recipients:
-            # If there is at least one user in queryset
-            for single_recipient in recipients.all():
-                Notification.create_notification(
-                    actor=actor,
-                    target_content_type=target_content_type,
-                    target_object_id=target_object_id,
-                    verb=verb,
-                    recipient=single_recipient
-                )
+        content_type = ContentType.objects.get_by_natural_key(NOTIFICATIONS_APP_LABEL, target_content_type)
+        recipient_ids = recipients.order_by().values_list("id", flat=True).iterator(
+            chunk_size=NOTIFICATIONS_BATCH_SIZE)
+
+        with transaction.atomic():
+            batch = []
+            for recipient_id in recipient_ids:
+                batch.append(Notification(actor_id=actor.id,
+                                          target_content_type=content_type,
+                                          target_object_id=target_object_id,
+                                          verb=verb,
+                                          recipient_id=recipient_id))
+                if len(batch) == NOTIFICATIONS_BATCH_SIZE:
+                    Notification.objects.bulk_create(batch)
+                    Notification.notifications_changed([notification.recipient_id for notification in batch],
+                                                       created=True)
+                    batch = []
+            if batch:
+                Notification.objects.bulk_create(batch)
+                Notification.notifications_changed([notification.recipient_id for notification in batch],
+                                                   created=True)
 
     @staticmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
@@ -96,11 +165,97 @@ class Notification(models.Model):
         """
         Notification.objects.create(
             actor=actor,
-            target_content_type=ContentType.objects.get(app_label="users",
-                                                        model=target_content_type),
+            target_content_type=ContentType.objects.get_by_natural_key(NOTIFICATIONS_APP_LABEL,
+                                                                       target_content_type),
             target_object_id=target_object_id,
             verb=verb,
             recipient=recipient)
+        Notification.notifications_changed([recipient.id], created=True)
+
+    @staticmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def create_target_notifications(
+            actor: User,
+            target_content_type: str,
+            verb: str,
+            targets: dict):
+        """
+        Creates notifications about the same activity performed to many objects
+
+        Notification is grouped with notification about the same activity
+        performed to the same target within NOTIFICATION_GROUP_WINDOW:
+        the group gets new actor and becomes unread again, so repeated
+        activity (e.g. like, unlike, like) doesn't create new rows.
+
+        Args:
+           actor: the authenticated user that performed the activity
+           target_content_type: type of the objects to which the activity was performed
+           verb: phrase that identifies the action of the activity
+           targets: dictionary {target_object_id: recipient_id}
+        """
+        if not targets:
+            return
+        content_type = ContentType.objects.get_by_natural_key(NOTIFICATIONS_APP_LABEL, target_content_type)
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Targets are locked, so concurrent first activities to the same target
+            # are serialized and the second one finds the group created by the first
+            list(content_type.model_class()._base_manager.select_for_update().filter(
+                id__in=targets
+            ).order_by("id").values_list("id", flat=True))
+            groups = Notification.objects.select_for_update().filter(
+                target_content_type=content_type,
+                target_object_id__in=targets,
+                verb=verb,
+                timestamp__gte=now - NOTIFICATION_GROUP_WINDOW
+            ).order_by("timestamp")
+            # The latest group of the target is updated
+            groups = {(group.target_object_id, group.recipient_id): group for group in groups}
+
+            new_notifications = []
+            updated_groups = []
+            for target_object_id, recipient_id in targets.items():
+                group = groups.get((target_object_id, recipient_id))
+                if group is None:
+                    new_notifications.append(Notification(actor=actor,
+                                                          target_content_type=content_type,
+                                                          target_object_id=target_object_id,
+                                                          verb=verb,
+                                                          recipient_id=recipient_id,
+                                                          recent_actors=[actor.id]))
+                else:
+                    group.add_actor(actor, now)
+                    updated_groups.append(group)
+            Notification.objects.bulk_create(new_notifications)
+            Notification.objects.bulk_update(updated_groups, ["actor", "actors_count", "recent_actors",
+                                                              "timestamp", "unread"])
+        Notification.notifications_changed(targets.values(), created=True)
+
+    def add_actor(self, actor: User, timestamp):
+        """Adds actor to the group of notifications, the group is saved by the caller
+
+        Actor is counted only if they are not one of the recent actors. Group
+        remembers NOTIFICATION_RECENT_ACTORS latest actors, so actors count
+        of larger group is approximate: actor who returns after that many
+        other actors is counted again.
+
+        Args:
+            actor: the authenticated user that performed the activity
+            timestamp: time of the activity
+        """
+        recent_actors = self.recent_actors or [self.actor_id]
+        if actor.id not in recent_actors:
+            self.actors_count += 1
+        self.recent_actors = [actor.id, *[actor_id for actor_id in recent_actors
+                                          if actor_id != actor.id]][:NOTIFICATION_RECENT_ACTORS]
+        self.actor = actor
+        self.timestamp = timestamp
+        self.unread = True
+
+    def get_other_actors_count(self) -> int:
+        """Returns number of actors of the group except the latest one"""
+        return self.actors_count - 1
 
     @staticmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
@@ -118,6 +273,7 @@ class Notification(models.Model):
         Notification.objects.create(actor=actor,
                                     verb=verb,
                                     recipient=recipient)
+        Notification.notifications_changed([recipient.id], created=True)
 
     @staticmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
@@ -130,44 +286,180 @@ class Notification(models.Model):
         Returns:
             QuerySet with notifications
         """
-        return Notification.objects.prefetch_related("actor").filter(recipient=user)
+        return Notification.objects.select_related("actor", "target_content_type").filter(recipient=user)
+
+    @staticmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def prefetch_targets(notifications: list):
+        """
+        Loads targets of notifications with one query per content type
+        and attaches them to notifications
+
+        Only fields listed in TARGET_FIELDS are loaded for known targets.
+        prefetch_related("target") isn't used, as GenericForeignKey in
+        Django 4.1 doesn't accept Prefetch with custom queryset and loads
+        all fields of the targets (GenericPrefetch appears in Django 5.0).
+
+        Args:
+            notifications: list of notifications with selected content types
+        """
+        target_ids = {}
+        for notification in notifications:
+            if notification.target_content_type_id is not None:
+                target_ids.setdefault(notification.target_content_type, set()).add(notification.target_object_id)
+
+        targets = {}
+        for content_type, ids in target_ids.items():
+            queryset = content_type.model_class()._base_manager.filter(id__in=ids)
+            if content_type.model in TARGET_FIELDS:
+                queryset = queryset.only(*TARGET_FIELDS[content_type.model])
+            targets.update({(content_type.id, target.id): target for target in queryset})
+
+        target_field = Notification._meta.get_field("target")
+        for notification in notifications:
+            target = targets.get((notification.target_content_type_id, notification.target_object_id))
+            if target is not None:
+                target_field.set_cached_value(notification, target)
 
+    @staticmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
-    def mark_as_read(self, user: User):
-        """Marks specific notification as read
+    def mark_as_read_for(user: User, ids: list = None) -> tuple:
+        """Marks notifications of the user as read with one UPDATE
 
         Args:
             user: authenticated user
+            ids: ids of notifications, all notifications of the user if None
+
+        Returns:
+            Number of notifications marked as read, unread and total count
+            of the user notifications after the change
         """
-        if self.recipient == user and self.unread:
-            self.unread = False
-            self.save()
+        return Notification._change_notifications(MARK_AS_READ_SQL, user, ids, delete=False)
 
+    @staticmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
-    def delete_notification(self, user: User):
-        """Deletes specific notification
+    def delete_for(user: User, ids: list = None) -> tuple:
+        """Deletes notifications of the user with one DELETE
+
+        Args:
+            user: authenticated user
+            ids: ids of notifications, all notifications of the user if None
+
+        Returns:
+            Number of deleted notifications, unread and total count
+            of the user notifications after the change
+        """
+        return Notification._change_notifications(DELETE_SQL, user, ids, delete=True)
+
+    @staticmethod
+    def _change_notifications(sql: str, user: User, ids: list, delete: bool) -> tuple:
+        """
+        Runs statement which changes notifications of the user,
+        in PostgreSQL counts are returned by the same statement
 
         Args:
+            sql: MARK_AS_READ_SQL or DELETE_SQL
             user: authenticated user
+            ids: ids of notifications, all notifications of the user if None
+            delete: True if notifications are deleted, else they are marked as read
         """
-        if self.recipient == user:
-            self.delete()
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(sql.format(table=connection.ops.quote_name(Notification._meta.db_table),
+                                          ids_filter=IDS_FILTER_SQL if ids is not None else ""),
+                               {"recipient_id": user.id, "ids": ids})
+                changed, unread_count, notification_count = cursor.fetchone()
+        else:
+            notifications = Notification.objects.filter(recipient=user)
+            selected = notifications if ids is None else notifications.filter(id__in=ids)
+            if delete:
+                changed = selected.delete()[0]
+            else:
+                changed = selected.filter(unread=True).update(unread=False)
+            unread_count = notifications.filter(unread=True).count()
+            notification_count = notifications.count()
+
+        if changed:
+            Notification.notifications_changed([user.id])
+        return changed, unread_count, notification_count
 
     @staticmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
     def delete_notification_by_target(target_content_type: str, target_object_id: int):
         """Deletes notifications related to specific target object"""
-        Notification.objects.filter(
+        notifications = Notification.objects.filter(
             target_content_type=target_content_type,
             target_object_id=target_object_id
-        ).delete()
+        )
+        recipient_ids = list(notifications.filter(unread=True).values_list("recipient_id", flat=True).distinct())
+        notifications.delete()
+        Notification.notifications_changed(recipient_ids)
+
+    @staticmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def delete_older_than(cutoff, read_only: bool, batch_size: int) -> int:
+        """
+        Deletes notifications older than cutoff in batches,
+        so every statement holds locks for a short time
+
+        Args:
+            cutoff: notifications created before this time are deleted
+            read_only: if True, only read notifications are deleted
+            batch_size: number of notifications deleted with one statement
+
+        Returns:
+            Number of deleted notifications
+        """
+        notifications = Notification.objects.filter(timestamp__lt=cutoff)
+        if read_only:
+            notifications = notifications.filter(unread=False)
+
+        deleted = 0
+        while True:
+            ids = list(notifications.order_by().values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            # Timestamp filter lets PostgreSQL skip partitions with newer notifications
+            deleted += notifications.filter(id__in=ids).delete()[0]
 
     @staticmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
     def count_unread(user):
         """Counts unread notifications of authenticated user
 
+        Count is cached until notifications of the user change. Cached
+        value expires after UNREAD_COUNT_CACHE_TIMEOUT, so a count missed
+        by some change is reconciled with the database periodically.
+
         Returns:
             Count of unread notifications
         """
-        return Notification.objects.filter(recipient=user, unread=True).count()
+        return caches[UNREAD_COUNT_CACHE].get_or_set(
+            UNREAD_COUNT_CACHE_KEY.format(user.id),
+            lambda: Notification.objects.filter(recipient=user, unread=True).count(),
+            UNREAD_COUNT_CACHE_TIMEOUT
+        )
+
+    @staticmethod
+    def notifications_changed(recipient_ids, created: bool = False):
+        """
+        Removes cached unread counts of the users and notifies their
+        connected clients after commit, so next read counts notifications
+        committed by this transaction
+
+        Args:
+            recipient_ids: ids of users whose notifications are changed
+            created: True if notifications are created
+        """
+        recipient_ids = set(recipient_ids)
+        if not recipient_ids:
+            return
+        keys = {UNREAD_COUNT_CACHE_KEY.format(recipient_id) for recipient_id in recipient_ids}
+        cache = caches[UNREAD_COUNT_CACHE]
+        # Count read in the same transaction must see the change too
+        cache.delete_many(keys)
+
+        def on_commit():
+            cache.delete_many(keys)
+            get_broker().publish(recipient_ids, {"created": created})
+        transaction.on_commit(on_commit)
@@ -0,0 +1,154 @@
+"""
+Module for monthly partitions of notifications table (PostgreSQL only)
+
+Notifications table is partitioned by RANGE of 'timestamp', one partition
+per month named '<table>_pYYYY_MM', plus DEFAULT partition for rows
+outside of created partitions. Old notifications are removed by dropping
+whole partitions instead of deleting rows.
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from notify.constants import DEFAULT_PARTITION_NAME, PARTITION_NAME, PARTITION_NAME_PATTERN
+
+CREATE_PARTITION_SQL = """
+    CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table}
+    FOR VALUES FROM (%(start)s) TO (%(end)s)
+"""
+
+PARTITION_EXISTS_SQL = "SELECT to_regclass(%s) IS NOT NULL"
+
+DEFAULT_HAS_ROWS_SQL = """
+    SELECT EXISTS (SELECT 1 FROM {default} WHERE "timestamp" >= %(start)s AND "timestamp" < %(end)s)
+"""
+
+# Rows of the month which were written to DEFAULT partition before the month partition was created
+MOVE_DEFAULT_ROWS_SQL = """
+    WITH moved AS (
+        DELETE FROM {default} WHERE "timestamp" >= %(start)s AND "timestamp" < %(end)s
+        RETURNING *
+    )
+    INSERT INTO {partition} SELECT * FROM moved
+"""
+
+PARTITIONS_SQL = """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+    JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+    WHERE parent.relname = %s
+"""
+
+IS_PARTITIONED_SQL = "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass"
+
+
+def get_month_start(value) -> date:
+    """Returns first day of the month of the date"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month_start: date, months: int) -> date:
+    """Returns first day of the month which is 'months' after the month"""
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_partition_name(table: str, month_start: date) -> str:
+    """Returns name of the partition with rows of the month"""
+    return PARTITION_NAME.format(table=table, year=month_start.year, month=month_start.month)
+
+
+def month_bound(month_start: date) -> datetime:
+    """Returns the first moment of the month in UTC"""
+    return datetime(month_start.year, month_start.month, 1, tzinfo=dt_timezone.utc)
+
+
+def create_partitions(cursor, table: str, first_month: date, last_month: date):
+    """Creates missing monthly partitions from first to last month, including both
+
+    Partition can't be created while DEFAULT partition has rows of its
+    month (e.g. partition wasn't created before the month started), so
+    DEFAULT partition is detached, its rows of the month are moved to
+    the new partition and it is attached again in one transaction.
+
+    Args:
+        cursor: database cursor
+        table: name of partitioned table
+        first_month: first day of the first month
+        last_month: first day of the last month
+    """
+    quote_name = connection.ops.quote_name
+    default = quote_name(DEFAULT_PARTITION_NAME.format(table=table))
+    month_start = first_month
+    while month_start <= last_month:
+        next_month = add_months(month_start, 1)
+        partition = quote_name(get_partition_name(table, month_start))
+        bounds = {"start": month_bound(month_start), "end": month_bound(next_month)}
+        month_start = next_month
+
+        cursor.execute(PARTITION_EXISTS_SQL, [partition])
+        if cursor.fetchone()[0]:
+            continue
+        with transaction.atomic():
+            cursor.execute(DEFAULT_HAS_ROWS_SQL.format(default=default), bounds)
+            if not cursor.fetchone()[0]:
+                cursor.execute(CREATE_PARTITION_SQL.format(table=quote_name(table), partition=partition), bounds)
+                continue
+            cursor.execute(f"ALTER TABLE {quote_name(table)} DETACH PARTITION {default}")
+            cursor.execute(CREATE_PARTITION_SQL.format(table=quote_name(table), partition=partition), bounds)
+            cursor.execute(MOVE_DEFAULT_ROWS_SQL.format(default=default, partition=partition), bounds)
+            cursor.execute(f"ALTER TABLE {quote_name(table)} ATTACH PARTITION {default} DEFAULT")
+
+
+def is_partitioned(table: str) -> bool:
+    """Returns True if the table is partitioned
+
+    Args:
+        table: name of the table
+    """
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(IS_PARTITIONED_SQL, [table])
+        return cursor.fetchone() is not None
+
+
+def create_future_partitions(table: str, months: int):
+    """Creates partitions of the current and the next months
+
+    Args:
+        table: name of partitioned table
+        months: number of months after the current one
+    """
+    current_month = get_month_start(timezone.now())
+    with connection.cursor() as cursor:
+        create_partitions(cursor, table, current_month, add_months(current_month, months))
+
+
+def drop_partitions_before(table: str, cutoff: datetime) -> list:
+    """Drops monthly partitions which have only rows older than cutoff
+
+    Args:
+        table: name of partitioned table
+        cutoff: rows older than this time are dropped
+
+    Returns:
+        Names of dropped partitions
+    """
+    pattern = re.compile(PARTITION_NAME_PATTERN.format(table=re.escape(table)))
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(PARTITIONS_SQL, [table])
+        for (partition,) in cursor.fetchall():
+            match = pattern.fullmatch(partition)
+            if match is None:
+                # DEFAULT partition is never dropped
+                continue
+            month_end = add_months(date(int(match["year"]), int(match["month"]), 1), 1)
+            if month_bound(month_end) <= cutoff:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(partition)}")
+                dropped.append(partition)
+    return dropped
@@ -10,32 +10,45 @@ from django.dispatch import receiver
 from notify.constants import NOTIFY_NEW_POST, ERROR_WHILE_CREATING_POST_NOTIFICATIONS, ERROR_WHILE_DELETING_NOTIFICATION
 from notify.models import Notification
 from users.models import Post, User, Image
+from utils.background import run_in_background
 
 logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Post)
-def new_post_notification(sender: Type[Post], instance: Post, **kwargs):
+def new_post_notification(sender: Type[Post], instance: Post, created: bool, **kwargs):
     """
-    Creates notification if new post is created
+    Creates notifications for followers of the author if new post is created
+
+    Notifications are created in background after the post is committed,
+    so the request doesn't wait for the fan-out and edits of the post
+    don't notify followers again.
 
     Args:
         sender: Post model
         instance: post instance
+        created: True if post is created
     """
+    if created:
+        run_in_background(notify_followers, instance.user, instance.id)
+
 
-    # Get user that created post
-    actor = User.objects.prefetch_related("followers").filter(id=instance.user.id).first()
+def notify_followers(actor: User, post_id: int):
+    """
+    Creates notifications about new post for all followers of the author
 
-    # Create notification
+    Args:
+        actor: author of the post
+        post_id: post id
+    """
     try:
         Notification.create_notifications(actor=actor,
-                                          target_content_type=sender.__name__.lower(),
-                                          target_object_id=instance.id,
+                                          target_content_type=Post.__name__.lower(),
+                                          target_object_id=post_id,
                                           verb=NOTIFY_NEW_POST,
-                                          recipients=actor.followers)
+                                          recipients=actor.followers.all())
     except OperationalError:
-        logger.exception(ERROR_WHILE_CREATING_POST_NOTIFICATIONS.format(instance.id))
+        logger.exception(ERROR_WHILE_CREATING_POST_NOTIFICATIONS.format(post_id))
 
 
 @receiver(pre_delete, sender=Image)
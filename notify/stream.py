@@ -0,0 +1,121 @@
+"""
+Module for server-sent events (SSE) stream of notifications
+
+Stream is plain ASGI application, every connection is a coroutine waiting
+for broker events, so one ASGI worker holds thousands of idle connections.
+Database is used only to authenticate the connection and to read the
+unread count when notifications of the user change.
+"""
+import asyncio
+import json
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http.cookie import parse_cookie
+
+from notify.broker import get_broker
+from notify.constants import NOTIFICATIONS_STREAM_PATH, STREAM_KEEPALIVE_INTERVAL
+from notify.models import Notification
+from users.models import User
+
+STREAM_HEADERS = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    # Disables response buffering of nginx
+    (b"x-accel-buffering", b"no"),
+]
+
+
+@sync_to_async
+def get_scope_user(scope: dict):
+    """Returns user authenticated by session cookie of the connection"""
+    headers = dict(scope["headers"])
+    cookies = parse_cookie(headers.get(b"cookie", b"").decode("latin-1"))
+    session = import_module(settings.SESSION_ENGINE).SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    try:
+        return get_user(SimpleNamespace(session=session))
+    finally:
+        close_old_connections()
+
+
+@sync_to_async
+def get_event_data(user: User, created: bool) -> dict:
+    """Returns unread count of the user and the latest notification if notifications are created"""
+    try:
+        data = {"unread_count": Notification.count_unread(user)}
+        notification = Notification.get_notifications(user).first() if created else None
+        if notification is not None:
+            data["notification"] = {
+                "id": notification.id,
+                "actor": notification.actor.get_full_name(),
+                "other_actors_count": notification.get_other_actors_count(),
+                "verb": notification.verb,
+            }
+        return data
+    finally:
+        close_old_connections()
+
+
+async def send_event(send, data: dict):
+    await send({"type": "http.response.body", "body": f"data: {json.dumps(data)}\n\n".encode(), "more_body": True})
+
+
+async def wait_for_disconnect(receive):
+    """Waits until client closes the connection"""
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def notifications_stream(scope: dict, receive, send):
+    """
+    Sends unread count after connection and after every change
+    of the user notifications, with the latest notification if it is new
+    """
+    user = await get_scope_user(scope)
+    if not user.is_authenticated:
+        await send({"type": "http.response.start", "status": 403, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"Authentication required"})
+        return
+
+    subscription = get_broker().subscribe(user.id)
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    event = asyncio.ensure_future(subscription.get())
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": STREAM_HEADERS})
+        await send_event(send, await get_event_data(user, created=False))
+
+        while True:
+            done, _ = await asyncio.wait({disconnect, event}, timeout=STREAM_KEEPALIVE_INTERVAL,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                break
+            if event in done:
+                # Events received while the previous one was sent are sent as one
+                created = event.result()["created"]
+                while not subscription.queue.empty():
+                    created = subscription.queue.get_nowait()["created"] or created
+                await send_event(send, await get_event_data(user, created))
+                event = asyncio.ensure_future(subscription.get())
+            else:
+                # Comment line keeps idle connection open through proxies
+                await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+    finally:
+        subscription.close()
+        disconnect.cancel()
+        event.cancel()
+
+
+class NotificationsStreamRouter:
+    """ASGI application which serves notifications stream and passes other requests to Django"""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope: dict, receive, send):
+        if scope["type"] == "http" and scope["path"] == NOTIFICATIONS_STREAM_PATH:
+            return await notifications_stream(scope, receive, send)
+        return await self.application(scope, receive, send)
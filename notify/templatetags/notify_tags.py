@@ -1,7 +1,9 @@
 from typing import Type
 
 from django import template
+from django.conf import settings
 
+from notify.constants import NOTIFICATIONS_STREAM_PATH
 from notify.models import Notification
 from users.models import User
 
@@ -12,3 +14,12 @@ register = template.Library()
 def unread_notification(user: Type[User]) -> int:
     """Returns count of authenticated user unread notifications"""
     return Notification.count_unread(user)
+
+
+@register.simple_tag
+def notifications_stream_url() -> str:
+    """
+    Returns url of server-sent events stream of notifications,
+    empty string if the site isn't served by ASGI application
+    """
+    return NOTIFICATIONS_STREAM_PATH if settings.NOTIFICATIONS_STREAM_ENABLED else ""
@@ -0,0 +1,38 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from notify.models import Notification
+from test_utils.utils import create_test_users
+
+# Verb used in tests
+TEST_VERB = "test"
+
+
+class PruneNotificationsCommandTest(TestCase):
+    """Tests for prune_notifications command"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1, cls.user2 = create_test_users()
+
+    def create_notification(self, days: int, unread: bool) -> Notification:
+        """Creates notification with timestamp 'days' before now"""
+        notification = Notification.objects.create(actor=self.user1, verb=TEST_VERB,
+                                                   recipient=self.user2, unread=unread)
+        Notification.objects.filter(id=notification.id).update(timestamp=timezone.now() - timedelta(days=days))
+        return notification
+
+    def test_old_notifications_are_removed(self):
+        """Ensure that old notifications and old read notifications are removed"""
+        kept = {self.create_notification(days=1, unread=False).id,
+                self.create_notification(days=100, unread=True).id}
+        self.create_notification(days=100, unread=False)
+        self.create_notification(days=400, unread=True)
+
+        call_command("prune_notifications", "--days=365", "--read-days=30", "--batch-size=1", stdout=StringIO())
+
+        self.assertEqual(set(Notification.objects.values_list("id", flat=True)), kept)
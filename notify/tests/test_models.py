@@ -1,11 +1,16 @@
-from django.test import TestCase
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ObjectDoesNotExist
 from parameterized import parameterized
 
-from notify.constants import NOTIFY_NEW_POST
+from notify.constants import NOTIFY_NEW_POST, NOTIFY_LIKE_POST, UNREAD_COUNT_CACHE
 from notify.models import Notification
-from test_utils.utils import create_test_users
-from users.models import Post
+from test_utils.utils import TEST_PASSWORD, create_test_users, create_test_user
+from users.models import Post, User
 
 # Verb used in tests
 TEST_VERB = "test"
@@ -82,6 +87,43 @@ class NotificationModelTest(TestCase):
         self.assertEqual(notification.recipient, self.user1)
         self.assertEqual(notification.target, post)
 
+    @patch("notify.models.NOTIFICATIONS_BATCH_SIZE", 2)
+    def test_create_notifications_in_batches(self):
+        """Test that create_notifications inserts notifications in batches"""
+        followers = User.objects.bulk_create([User(email=f"follower{number}@email.com") for number in range(5)])
+        self.user2.followers.add(*followers)
+        post = Post.objects.create(user=self.user2)
+        Notification.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            Notification.create_notifications(actor=self.user2,
+                                              target_content_type=Post.__name__.lower(),
+                                              target_object_id=post.id,
+                                              verb=NOTIFY_NEW_POST,
+                                              recipients=self.user2.followers.all())
+
+        inserts = [query for query in queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(set(Notification.objects.filter(target_object_id=post.id).values_list("recipient", flat=True)),
+                         {follower.id for follower in followers})
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_followers_are_notified_after_post_creation_only(self):
+        """Test that followers are notified after new post is committed, but not after its edit"""
+        self.user1.following.add(self.user2)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            post = Post.objects.create(user=self.user2, content="Post")
+        self.assertFalse(Notification.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(Notification.objects.filter(recipient=self.user1, target_object_id=post.id).count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.content = "Edited post"
+            post.save()
+        self.assertEqual(Notification.objects.count(), 1)
+
     def test_get_notification(self):
         """Test for get_notification method"""
         # Create notification
@@ -93,23 +135,69 @@ class NotificationModelTest(TestCase):
         self.assertEqual(notification.actor, self.user1)
         self.assertEqual(notification.recipient, self.user2)
 
-    def test_mark_as_read(self):
-        """Test for mark_as_read method"""
+    def test_mark_as_read_for(self):
+        """Test for mark_as_read_for method"""
         notification = Notification.objects.create(actor=self.user1,
                                                    verb=TEST_VERB,
                                                    recipient=self.user2)
         self.assertTrue(notification.unread)
+        # Notifications of other users are not changed
+        self.assertEqual(Notification.mark_as_read_for(self.user1, [notification.id]), (0, 0, 0))
         # Mark as read
-        notification.mark_as_read(self.user2)
+        self.assertEqual(Notification.mark_as_read_for(self.user2, [notification.id]), (1, 0, 1))
         # Refresh 'unread' field
         notification.refresh_from_db(fields=["unread"])
         self.assertFalse(notification.unread)
 
-    def test_delete_notification(self):
-        """Test delete_notification method"""
+    def test_delete_for(self):
+        """Test delete_for method"""
 
         notification = Notification.objects.create(actor=self.user1,
                                                    verb=TEST_VERB,
                                                    recipient=self.user2)
-        notification.delete_notification(self.user2)
+        self.assertEqual(Notification.delete_for(self.user1, [notification.id]), (0, 0, 0))
+        self.assertEqual(Notification.delete_for(self.user2, [notification.id]), (1, 0, 0))
         self.assertFalse(Notification.objects.count())
+
+    def test_unread_count_is_cached(self):
+        """Test that unread count is cached and reset when notifications change"""
+        caches[UNREAD_COUNT_CACHE].clear()
+        Notification.create_notification_without_target(self.user1, TEST_VERB, self.user2)
+        self.assertEqual(Notification.count_unread(self.user2), 1)
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(Notification.count_unread(self.user2), 1)
+        self.assertFalse([query for query in context.captured_queries if "COUNT(" in query["sql"]])
+
+        Notification.mark_as_read_for(self.user2)
+        self.assertEqual(Notification.count_unread(self.user2), 0)
+
+    def test_target_notifications_are_grouped(self):
+        """Test that repeated activity to the same target updates one notification"""
+        user3 = create_test_user()
+        post = Post.objects.create(user=self.user2)
+        for actor in (self.user1, self.user1, user3):
+            Notification.create_target_notifications(actor=actor,
+                                                     target_content_type=Post.__name__.lower(),
+                                                     verb=NOTIFY_LIKE_POST,
+                                                     targets={post.id: self.user2.id})
+
+        notification = Notification.objects.get(recipient=self.user2)
+        self.assertEqual(notification.actor, user3)
+        self.assertEqual(notification.actors_count, 2)
+        self.assertEqual(notification.recent_actors, [user3.id, self.user1.id])
+
+    def test_returning_actor_is_not_counted_again(self):
+        """Test that actor returning to a group after several other actors is counted once"""
+        actors = [self.user1, *[User.objects.create_user(email=f"actor{index}@email.com", password=TEST_PASSWORD)
+                                for index in range(4)], self.user1]
+        posts = [Post.objects.create(user=self.user2) for _ in range(2)]
+        for actor in actors:
+            Notification.create_target_notifications(actor=actor,
+                                                     target_content_type=Post.__name__.lower(),
+                                                     verb=NOTIFY_LIKE_POST,
+                                                     targets={post.id: self.user2.id for post in posts})
+
+        for notification in Notification.objects.filter(recipient=self.user2):
+            self.assertEqual(notification.actor, self.user1)
+            self.assertEqual(notification.actors_count, 5)
@@ -0,0 +1,73 @@
+import json
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from notify.constants import NOTIFICATIONS_STREAM_PATH
+from notify.models import Notification
+from notify.stream import notifications_stream
+from test_utils.utils import create_test_users
+
+# Verb used in tests
+TEST_VERB = "test"
+
+
+class NotificationsStreamTest(TestCase):
+    """Tests for server-sent events stream of notifications"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1, cls.user2 = create_test_users()
+
+    def get_scope(self, cookie: str = "") -> dict:
+        """Returns ASGI scope of the stream request"""
+        return {"type": "http", "method": "GET", "path": NOTIFICATIONS_STREAM_PATH,
+                "headers": [(b"cookie", cookie.encode())]}
+
+    def create_notification(self):
+        """Creates notification for user2 and runs commit callbacks"""
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.create_notification_without_target(self.user1, TEST_VERB, self.user2)
+
+    async def receive_event(self, communicator: ApplicationCommunicator) -> dict:
+        """Returns data of the next event"""
+        message = await communicator.receive_output(timeout=5)
+        return json.loads(message["body"].decode().removeprefix("data: "))
+
+    async def test_anonymous_user_is_rejected(self):
+        """Ensure that stream requires authentication"""
+        communicator = ApplicationCommunicator(notifications_stream, self.get_scope())
+        await communicator.send_input({"type": "http.request"})
+        response_start = await communicator.receive_output(timeout=5)
+        self.assertEqual(response_start["status"], 403)
+
+    async def test_new_notification_is_pushed(self):
+        """Ensure that unread count and new notification are pushed to connected user"""
+        await sync_to_async(self.client.force_login)(self.user2)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        communicator = ApplicationCommunicator(notifications_stream, self.get_scope(cookie))
+        await communicator.send_input({"type": "http.request"})
+
+        response_start = await communicator.receive_output(timeout=5)
+        self.assertEqual(response_start["status"], 200)
+        self.assertEqual(await self.receive_event(communicator), {"unread_count": 0})
+
+        await sync_to_async(self.create_notification)()
+        event = await self.receive_event(communicator)
+        self.assertEqual(event["unread_count"], 1)
+        self.assertEqual(event["notification"]["verb"], TEST_VERB)
+
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(timeout=5)
+
+    def test_stream_url_is_rendered_only_for_asgi_deployment(self):
+        """Ensure that pages connect to the stream only if it is enabled"""
+        self.client.force_login(self.user2)
+        with override_settings(NOTIFICATIONS_STREAM_ENABLED=False):
+            self.assertNotContains(self.client.get(reverse("notify:all")), "data-stream-url")
+        with override_settings(NOTIFICATIONS_STREAM_ENABLED=True):
+            self.assertContains(self.client.get(reverse("notify:all")),
+                                f'data-stream-url="{NOTIFICATIONS_STREAM_PATH}"')
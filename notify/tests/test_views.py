@@ -1,13 +1,17 @@
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
-
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notify.constants import (
     NOTIFICATIONS_URL, ALL_NOTIFICATIONS_TEMPLATE, NOTIFICATIONS_READ_URL,
-    NOTIFICATIONS_DELETE_URL
+    NOTIFICATIONS_DELETE_URL, NOTIFICATIONS_READ_SELECTED_URL, NOTIFICATIONS_READ_ALL_URL,
+    NOTIFICATIONS_DELETE_SELECTED_URL, NOTIFICATIONS_API_URL, UNREAD_COUNT_CACHE
 )
 from notify.models import Notification
 from test_utils.utils import create_test_user, create_test_users
+from users.models import Post, Image
 from users.constants import GET_USER_PROFILE_URL
 
 
@@ -33,6 +37,83 @@ class NotificationListViewTest(TestCase):
         response = self.client.get(reverse(NOTIFICATIONS_URL))
         self.assertTemplateUsed(response, ALL_NOTIFICATIONS_TEMPLATE)
 
+    def create_target_notifications(self, number: int):
+        """Creates notifications about posts and images of the user"""
+        post = Post.objects.create(user=self.user, content="Post")
+        for _ in range(number):
+            image = Image.objects.create(post=post, image="test.jpg")
+            Notification.create_notification(self.user, "post", post.id, "liked your post", self.user)
+            Notification.create_notification(self.user, "image", image.id, "liked your image", self.user)
+        return post
+
+    def get_number_of_queries(self) -> int:
+        """Returns number of queries run by notifications page"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(NOTIFICATIONS_URL))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_targets_are_prefetched(self):
+        """Ensure that number of queries doesn't depend on number of notifications"""
+        post = self.create_target_notifications(1)
+        number_of_queries = self.get_number_of_queries()
+
+        self.create_target_notifications(4)
+        self.assertEqual(self.get_number_of_queries(), number_of_queries)
+        response = self.client.get(reverse(NOTIFICATIONS_URL))
+        self.assertContains(response, reverse("posts:feed_post", args=[post.id]))
+
+
+class NotificationApiViewTest(TestCase):
+    """Tests for NotificationApiView"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Create test users
+        cls.user1, cls.user2 = create_test_users()
+
+    def setUp(self):
+        # Login user for all tests
+        self.client.force_login(self.user2)
+
+    def create_notification(self) -> Notification:
+        return Notification.objects.create(actor=self.user1, verb="test", recipient=self.user2)
+
+    def test_only_new_notifications_are_returned(self):
+        """Ensure that newer cursor returns only notifications created after the page"""
+        old_notifications = [self.create_notification() for _ in range(2)]
+        data = self.client.get(reverse(NOTIFICATIONS_API_URL)).json()
+        self.assertEqual([notification["id"] for notification in data["results"]],
+                         [notification.id for notification in reversed(old_notifications)])
+        self.assertIsNone(data["next_cursor"])
+
+        # Nothing is new
+        response = self.client.get(reverse(NOTIFICATIONS_API_URL), {"cursor": data["newer_cursor"]})
+        self.assertEqual(response.status_code, 304)
+
+        new_notification = self.create_notification()
+        data = self.client.get(reverse(NOTIFICATIONS_API_URL), {"cursor": data["newer_cursor"]}).json()
+        self.assertEqual([notification["id"] for notification in data["results"]], [new_notification.id])
+        self.assertEqual(data["results"][0]["actor"]["id"], self.user1.id)
+
+    def test_empty_inbox_has_newer_cursor(self):
+        """Ensure that client with empty inbox can poll for new notifications"""
+        data = self.client.get(reverse(NOTIFICATIONS_API_URL)).json()
+        self.assertEqual(data["results"], [])
+        self.assertIsNotNone(data["newer_cursor"])
+
+        response = self.client.get(reverse(NOTIFICATIONS_API_URL), {"cursor": data["newer_cursor"]})
+        self.assertEqual(response.status_code, 304)
+
+        new_notification = self.create_notification()
+        data = self.client.get(reverse(NOTIFICATIONS_API_URL), {"cursor": data["newer_cursor"]}).json()
+        self.assertEqual([notification["id"] for notification in data["results"]], [new_notification.id])
+
+    def test_invalid_cursor(self):
+        """Ensure that invalid cursor is answered with 404"""
+        response = self.client.get(reverse(NOTIFICATIONS_API_URL), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, 404)
+
 
 class MarkNotificationAsReadViewTest(TestCase):
     """Test for MarkNotificationAsReadView"""
@@ -43,8 +124,8 @@ class MarkNotificationAsReadViewTest(TestCase):
         cls.user1, cls.user2 = create_test_users()
 
     def setUp(self):
-        # Login user for all tests
-        self.client.force_login(self.user1)
+        # Login recipient of the notification for all tests
+        self.client.force_login(self.user2)
         self.notification = Notification.objects.create(actor=self.user1,
                                                         verb="test",
                                                         recipient=self.user2)
@@ -60,10 +141,18 @@ class MarkNotificationAsReadViewTest(TestCase):
         Ensure that user is redirected to user profile page
         if wrong notification id"
         """
-        response = self.client.get(reverse(NOTIFICATIONS_READ_URL, args=[1]))
+        response = self.client.get(reverse(NOTIFICATIONS_READ_URL, args=[self.notification.id + 1]))
 
         self.assertEqual(response.status_code, 404)
 
+    def test_other_user_notification(self):
+        """Ensure that notification of other user is not found"""
+        notification = Notification.objects.create(actor=self.user2, verb="test", recipient=self.user1)
+        response = self.client.get(reverse(NOTIFICATIONS_READ_URL, args=[notification.id]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Notification.objects.filter(id=notification.id, unread=True).exists())
+
 
 class DeleteNotificationAsReadViewTest(TestCase):
     """Test for DeleteNotificationAsReadView"""
@@ -74,8 +163,8 @@ class DeleteNotificationAsReadViewTest(TestCase):
         cls.user1, cls.user2 = create_test_users()
 
     def setUp(self):
-        # Login user for all tests
-        self.client.force_login(self.user1)
+        # Login recipient of the notification for all tests
+        self.client.force_login(self.user2)
         self.notification = Notification.objects.create(actor=self.user1,
                                                         verb="test",
                                                         recipient=self.user2)
@@ -91,6 +180,63 @@ class DeleteNotificationAsReadViewTest(TestCase):
         if wrong notification id
         """
 
-        response = self.client.get(reverse(NOTIFICATIONS_DELETE_URL, args=[1]))
+        response = self.client.get(reverse(NOTIFICATIONS_DELETE_URL, args=[self.notification.id + 1]))
         self.assertEqual(response.status_code, 404)
 
+    def test_other_user_notification(self):
+        """Ensure that notification of other user is not found"""
+        notification = Notification.objects.create(actor=self.user2, verb="test", recipient=self.user1)
+        response = self.client.get(reverse(NOTIFICATIONS_DELETE_URL, args=[notification.id]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Notification.objects.filter(id=notification.id, unread=True).exists())
+
+
+class SelectedNotificationsViewTest(TestCase):
+    """Tests for views which change many notifications of the user"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Create test users
+        cls.user1, cls.user2 = create_test_users()
+
+    def setUp(self):
+        # Cached unread counts of users from other tests
+        caches[UNREAD_COUNT_CACHE].clear()
+        # Login user for all tests
+        self.client.force_login(self.user2)
+        self.notifications = [Notification.objects.create(actor=self.user1, verb="test", recipient=self.user2)
+                              for _ in range(3)]
+        self.other_notification = Notification.objects.create(actor=self.user2, verb="test", recipient=self.user1)
+
+    def post_ids(self, url: str, ids: list):
+        """Sends selected notification ids"""
+        return self.client.post(reverse(url), data={"ids": ids}, content_type="application/json")
+
+    def test_mark_selected_as_read(self):
+        """Ensure that only selected notifications of the user are marked as read"""
+        response = self.post_ids(NOTIFICATIONS_READ_SELECTED_URL,
+                                 [self.notifications[0].id, self.other_notification.id])
+
+        self.assertEqual(response.json(), {"changed": 1, "notification_count": 3, "unread_notification_count": 2})
+        self.assertTrue(Notification.objects.get(id=self.other_notification.id).unread)
+
+    def test_mark_all_as_read(self):
+        """Ensure that all notifications of the user are marked as read"""
+        response = self.client.post(reverse(NOTIFICATIONS_READ_ALL_URL))
+
+        self.assertEqual(response.json(), {"changed": 3, "notification_count": 3, "unread_notification_count": 0})
+        self.assertEqual(Notification.count_unread(self.user1), 1)
+
+    def test_delete_selected(self):
+        """Ensure that only selected notifications of the user are deleted"""
+        response = self.post_ids(NOTIFICATIONS_DELETE_SELECTED_URL,
+                                 [self.notifications[0].id, self.notifications[1].id, self.other_notification.id])
+
+        self.assertEqual(response.json(), {"changed": 2, "notification_count": 1, "unread_notification_count": 1})
+        self.assertTrue(Notification.objects.filter(id=self.other_notification.id).exists())
+
+    def test_invalid_ids(self):
+        """Ensure that invalid body is rejected"""
+        response = self.post_ids(NOTIFICATIONS_DELETE_SELECTED_URL, ["1"])
+        self.assertEqual(response.status_code, 400)
@@ -2,13 +2,18 @@
 from django.urls import path
 
 from .views import (
-    NotificationListView, MarkNotificationAsReadView, DeleteNotificationView
+    NotificationListView, NotificationApiView, MarkNotificationAsReadView, DeleteNotificationView,
+    MarkNotificationsAsReadView, MarkAllNotificationsAsReadView, DeleteNotificationsView
 )
 
 app_name = "notify"
 
 urlpatterns = [
     path("all", NotificationListView.as_view(), name="all"),
+    path("api", NotificationApiView.as_view(), name="api"),
     path("<int:notification_id>/read", MarkNotificationAsReadView.as_view(), name="read"),
     path("<int:notification_id>/delete", DeleteNotificationView.as_view(), name="delete"),
+    path("read", MarkNotificationsAsReadView.as_view(), name="read_selected"),
+    path("read/all", MarkAllNotificationsAsReadView.as_view(), name="read_all"),
+    path("delete", DeleteNotificationsView.as_view(), name="delete_selected"),
 ]
\ No newline at end of file
@@ -0,0 +1 @@
+"""Module for notify app utilities"""
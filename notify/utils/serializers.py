@@ -0,0 +1,36 @@
+"""Module for converting notifications to JSON serializable data"""
+from django.urls import reverse
+
+from notify.models import Notification
+from posts.constants import SINGLE_POST_FEED_URL
+from users.constants import USER_PAGE_URL
+
+
+def get_target_url(notification: Notification):
+    """Returns url of the post related to notification target, None if there is no target"""
+    target = notification.target
+    if target is None:
+        return None
+    post_id = target.post_id if notification.target_content_type.model == "image" else target.id
+    return reverse(SINGLE_POST_FEED_URL, args=[post_id])
+
+
+def serialize_notification(notification: Notification) -> dict:
+    """Converts notification to dictionary
+
+    Args:
+        notification: notification loaded by Notification.get_notifications, with prefetched target
+    """
+    return {
+        "id": notification.id,
+        "verb": notification.verb,
+        "unread": notification.unread,
+        "timestamp": notification.timestamp.isoformat(),
+        "actor": {
+            "id": notification.actor.id,
+            "full_name": notification.actor.get_full_name(),
+            "url": reverse(USER_PAGE_URL, args=[notification.actor.id]),
+        },
+        "other_actors_count": notification.get_other_actors_count(),
+        "target_url": get_target_url(notification),
+    }
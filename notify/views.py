@@ -1,14 +1,24 @@
 """Views for notifications"""
+import json
+from abc import ABC, abstractmethod
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
-from django.shortcuts import redirect, get_object_or_404
+from django.http import Http404, HttpResponseNotModified, JsonResponse
+from django.shortcuts import redirect
 from django.views import View
+from django.utils import timezone
 from django.views.generic import ListView
 
 from notify.models import Notification
-from notify.constants import ALL_NOTIFICATIONS_TEMPLATE, NOTIFICATIONS_URL
+from notify.constants import (
+    ALL_NOTIFICATIONS_TEMPLATE, NOTIFICATIONS_URL, NOTIFICATION_DOES_NOT_EXIST, INVALID_NOTIFICATION_IDS_MSG,
+    SELECTED_NOTIFICATIONS_LIMIT, NOTIFICATION_CURSOR_KEYS, NOTIFICATIONS_PER_PAGE
+)
+from notify.utils.serializers import serialize_notification
 from users.constants import GET_USER_PROFILE_URL
+from utils.constants import CURSOR, CURSOR_PREVIOUS
+from utils.pagination import CursorPaginator, InvalidCursor
 
 
 class NotificationListView(LoginRequiredMixin, ListView):
@@ -23,20 +33,68 @@ class NotificationListView(LoginRequiredMixin, ListView):
         notifications = Notification.get_notifications(self.request.user)
         return notifications
 
+    def get_context_data(self, **kwargs):
+        """Attach targets to notifications of the page"""
+        context = super().get_context_data(**kwargs)
+        notifications = list(context["notifications"])
+        Notification.prefetch_targets(notifications)
+        context["notifications"] = context["object_list"] = notifications
+        return context
+
+
+class NotificationApiView(LoginRequiredMixin, View):
+    """
+    Returns page of the user notifications as JSON
+
+    Without cursor the latest notifications are returned. 'next_cursor'
+    selects older notifications, 'newer_cursor' selects notifications
+    created (or grouped again) after the page. Request with newer cursor
+    is answered with 304 when there are no new notifications, so client
+    polls only for the delta. For empty inbox newer cursor selects
+    notifications created after the request.
+    """
+
+    def get(self, request):
+        paginator = CursorPaginator(Notification.get_notifications(request.user), NOTIFICATIONS_PER_PAGE,
+                                    keys=NOTIFICATION_CURSOR_KEYS)
+        cursor = request.GET.get(CURSOR)
+        try:
+            page = paginator.page(cursor)
+            newer = cursor is not None and paginator.decode_cursor(cursor)[0] == CURSOR_PREVIOUS
+        except InvalidCursor as error:
+            raise Http404(str(error))
+
+        notifications = page.object_list
+        if not notifications and newer:
+            return HttpResponseNotModified()
+
+        Notification.prefetch_targets(notifications)
+        newer_cursor = cursor if newer else None
+        if notifications:
+            newer_cursor = paginator.encode_cursor(CURSOR_PREVIOUS, paginator.get_key(notifications[0]))
+        elif cursor is None:
+            # Ids are positive, so (now, 0) is before any notification created later
+            newer_cursor = paginator.encode_cursor(CURSOR_PREVIOUS, (timezone.now(), 0))
+        return JsonResponse({
+            "results": [serialize_notification(notification) for notification in notifications],
+            "next_cursor": page.next_cursor,
+            "newer_cursor": newer_cursor,
+        })
+
 
 class MarkNotificationAsReadView(LoginRequiredMixin, View):
     """View for mark specific notification as read """
 
     def get(self, request, notification_id):
         """Marks notification as read"""
-        user = self.request.user
-
-        notification = get_object_or_404(Notification, id=notification_id)
-        notification.mark_as_read(user)
+        changed, unread_count, _ = Notification.mark_as_read_for(request.user, [notification_id])
+        # Nothing is changed for notification which is already read, or which isn't user notification
+        if not changed and not Notification.objects.filter(id=notification_id, recipient=request.user).exists():
+            raise Http404(NOTIFICATION_DOES_NOT_EXIST)
 
         response = {
             "notification_read": True,
-            "unread_notification_count": Notification.count_unread(user)
+            "unread_notification_count": unread_count
         }
 
         return JsonResponse(response)
@@ -47,14 +105,75 @@ class DeleteNotificationView(LoginRequiredMixin, View):
 
     def get(self, request, notification_id):
         """Deletes specific notification"""
-        user = self.request.user
-
-        notification = get_object_or_404(Notification, id=notification_id)
-        notification.delete_notification(user)
+        changed, unread_count, notification_count = Notification.delete_for(request.user, [notification_id])
+        if not changed:
+            raise Http404(NOTIFICATION_DOES_NOT_EXIST)
 
         response = {
-            "notification_count": Notification.get_notifications(user).count(),
-            "unread_notification_count": Notification.count_unread(user)
+            "notification_count": notification_count,
+            "unread_notification_count": unread_count
         }
 
         return JsonResponse(response)
+
+
+class SelectedNotificationsMixin(ABC):
+    """
+    Changes notifications of the user selected by request body
+    {"ids": [1, 2, ...]} with one statement
+    """
+    select_all = False
+
+    @abstractmethod
+    def change_notifications(self, ids: list) -> tuple:
+        """Changes notifications, returns the result of Notification method"""
+
+    def post(self, request):
+        ids = None
+        if not self.select_all:
+            try:
+                ids = self.parse_ids(request.body)
+            except ValueError:
+                error = INVALID_NOTIFICATION_IDS_MSG.format(SELECTED_NOTIFICATIONS_LIMIT)
+                return JsonResponse({"error": error}, status=400)
+
+        changed, unread_count, notification_count = self.change_notifications(ids)
+        response = {
+            "changed": changed,
+            "notification_count": notification_count,
+            "unread_notification_count": unread_count
+        }
+        return JsonResponse(response)
+
+    @staticmethod
+    def parse_ids(body: bytes) -> list:
+        """Returns list of notification ids from request body
+
+        Raises:
+            ValueError: if body is not valid list of ids
+        """
+        data = json.loads(body)
+        if not isinstance(data, dict) or not isinstance(data.get("ids"), list) \
+                or len(data["ids"]) > SELECTED_NOTIFICATIONS_LIMIT \
+                or any(type(notification_id) is not int for notification_id in data["ids"]):
+            raise ValueError(data)
+        return data["ids"]
+
+
+class MarkNotificationsAsReadView(LoginRequiredMixin, SelectedNotificationsMixin, View):
+    """View for marking selected notifications as read"""
+
+    def change_notifications(self, ids: list) -> tuple:
+        return Notification.mark_as_read_for(self.request.user, ids)
+
+
+class MarkAllNotificationsAsReadView(MarkNotificationsAsReadView):
+    """View for marking all notifications of the user as read"""
+    select_all = True
+
+
+class DeleteNotificationsView(LoginRequiredMixin, SelectedNotificationsMixin, View):
+    """View for deletion of selected notifications"""
+
+    def change_notifications(self, ids: list) -> tuple:
+        return Notification.delete_for(self.request.user, ids)
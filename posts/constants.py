@@ -3,14 +3,34 @@
 # Constants for url name (<app>:<url_name>)
 POSTS_FEED_URL = "posts:posts"
 SINGLE_POST_FEED_URL = "posts:feed_post"
+TAG_FEED_URL = "posts:tag_feed"
+
+# Feed titles
+LATEST_POSTS_TITLE = "Latest Posts"
+FOLLOWING_POSTS_TITLE = "Following"
+TAG_POSTS_TITLE = "#{name} ({count} posts)"
+SEARCH_POSTS_TITLE = "Search results for \"{query}\""
 
 # Messages in views
 POST_CREATED_MSG = "Post created successfully!"
 POST_UPDATED_MSG = "Post updated successfully!"
 POST_DELETED_MSG = "Post deleted successfully!"
+POST_NOT_FOUND_MSG = "Post with id {} not found"
 
 # URL parameter
 POST_ID = "post_id"
+TAG_SLUG = "tag_slug"
+
+# URL query parameter
+SEARCH_QUERY = "q"
+
+# Batch of likes
+LIKES_BATCH_LIMIT = 100
+INVALID_LIKES_BATCH_MSG = "Expected JSON object with 'likes' list of at most {} items " \
+                          "{{\"type\": \"post\" | \"image\", \"id\": <int>, \"liked\": <bool>}}"
+
+# Transformation of the post cover image in the feed
+COVER_IMAGE_OPTIONS = {"width": 200, "height": 200, "crop": "fill", "gravity": "face"}
 
 # URLs
 POST_CONFIRM_DELETE_TEMPLATE = "posts/post_confirm_delete.html"
@@ -0,0 +1,12 @@
+"""Management command for deleting queued media files from media storage"""
+from django.core.management.base import BaseCommand
+
+from users.models import MediaDeletion
+
+
+class Command(BaseCommand):
+    help = "Deletes files queued for deletion from media storage, including failed deletions which are due"
+
+    def handle(self, *args, **options):
+        processed = MediaDeletion.delete_queued()
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} queued media deletions"))
@@ -0,0 +1,23 @@
+"""Management command for rebuilding 'following' feed timelines"""
+from django.core.management.base import BaseCommand
+
+from users.constants import FAN_OUT_BATCH_SIZE
+from users.models import Timeline, User
+
+
+class Command(BaseCommand):
+    help = "Rebuilds precomputed timelines of the 'following' feed for all users"
+
+    def handle(self, *args, **options):
+        Timeline.objects.all().delete()
+
+        users_count = 0
+        users = User.objects.prefetch_related("following").iterator(chunk_size=FAN_OUT_BATCH_SIZE)
+        for user in users:
+            users_count += 1
+            # User own posts are the part of the timeline
+            Timeline.add_user_posts(user.id, user)
+            for author in user.following.all():
+                Timeline.add_user_posts(user.id, author)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt timelines of {users_count} users"))
@@ -0,0 +1,34 @@
+"""Management command for recounting denormalized followers counters"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import User
+
+# Number of rows checked in one UPDATE statement
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = "Recounts followers_count of users that drifted from the follows table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help="Number of rows checked in one UPDATE statement")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        followers = User.following.through.objects.filter(
+            to_user_id=OuterRef("pk")
+        ).order_by().values("to_user_id").annotate(count=Count("*")).values("count")
+        followers_count = Coalesce(Subquery(followers), 0)
+
+        fixed = 0
+        max_id = User.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+        for start in range(0, max_id + 1, batch_size):
+            fixed += User.objects.filter(
+                id__gte=start, id__lt=start + batch_size
+            ).alias(real_followers_count=followers_count).exclude(
+                followers_count=F("real_followers_count")
+            ).update(followers_count=followers_count)
+        self.stdout.write(self.style.SUCCESS(f"Fixed followers count of {fixed} users"))
@@ -0,0 +1,50 @@
+"""Management command for recounting denormalized likes counters"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Image, Post
+
+# Number of rows checked in one UPDATE statement
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = "Recounts likes_count of posts and images that drifted from the likes table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help="Number of rows checked in one UPDATE statement")
+
+    def handle(self, *args, **options):
+        for model in (Post, Image):
+            fixed = self.recount(model, options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: fixed likes count of {fixed} rows"))
+
+    @staticmethod
+    def recount(model, batch_size: int) -> int:
+        """Updates likes_count of the model rows where it differs from the real count
+
+        Args:
+            model: Post or Image model
+            batch_size: number of rows checked in one UPDATE statement
+
+        Returns:
+            Number of fixed rows
+        """
+        through = model.likes.through
+        source_field_name = model.likes.field.m2m_field_name()
+        likes = through.objects.filter(
+            **{source_field_name: OuterRef("pk")}
+        ).order_by().values(source_field_name).annotate(count=Count("*")).values("count")
+        likes_count = Coalesce(Subquery(likes), 0)
+
+        fixed = 0
+        max_id = model.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+        for start in range(0, max_id + 1, batch_size):
+            fixed += model.objects.filter(
+                id__gte=start, id__lt=start + batch_size
+            ).alias(real_likes_count=likes_count).exclude(
+                likes_count=F("real_likes_count")
+            ).update(likes_count=likes_count)
+        return fixed
@@ -0,0 +1,21 @@
+"""Management command for resolving posts left pending by lost upload tasks"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.constants import PENDING_POST_TIMEOUT_MINUTES
+from users.models import Post
+
+
+class Command(BaseCommand):
+    help = ("Marks posts pending longer than timeout as ready with images uploaded so far. "
+            "Should be run periodically.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--minutes", type=int, default=PENDING_POST_TIMEOUT_MINUTES,
+                            help="Posts pending longer than this number of minutes are resolved")
+
+    def handle(self, *args, **options):
+        resolved = Post.resolve_stale_pending(timezone.now() - timedelta(minutes=options["minutes"]))
+        self.stdout.write(self.style.SUCCESS(f"Resolved {resolved} stale pending posts"))
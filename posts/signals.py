@@ -1,21 +1,115 @@
 from typing import Type
 
-import cloudinary.uploader
-from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_delete, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
-from users.models import Post
-from utils.project_utils import delete_image_from_cloudinary
+from users.models import Post, Timeline, User, Image, TaggedPost, TagPostsCount
+from utils.background import run_in_background
+from utils.project_utils import delete_images_from_storage
 
 
 @receiver(pre_delete, sender=Post)
 def delete_images(sender: Type[Post], instance: Post, **kwargs):
     """
-    Delete images from cloudinary before post deletion
+    Queue images for deletion from media storage before post deletion
 
     Args:
         sender: Post model
         instance: post instance
     """
     images = instance.get_post_images()
-    delete_image_from_cloudinary(images)
+    delete_images_from_storage(images)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender: Type[Post], instance: Post, created: bool, **kwargs):
+    """
+    Writes new post to the author timeline, and to timelines of the author
+    followers in background after the post is committed
+
+    Args:
+        sender: Post model
+        instance: post instance
+        created: True if post is created
+    """
+    if created:
+        Timeline.add_author_post(instance)
+        run_in_background(Timeline.fan_out_post, instance.id)
+
+
+@receiver(m2m_changed, sender=User.following.through)
+def update_timeline(instance: User, action: str, reverse: bool, pk_set: set, **kwargs):
+    """
+    Adds posts of followed users to the timeline and removes
+    posts of unfollowed users from it
+
+    Args:
+        instance: user whose 'following' (or 'followers' if reverse) is changed
+        action: type of the update
+        reverse: True if relation is changed from 'followers' side
+        pk_set: ids of added or removed users
+    """
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+
+    if reverse:
+        # Users from pk_set follow or unfollow the instance
+        pairs = [(follower_id, instance) for follower_id in pk_set]
+    else:
+        pairs = [(instance.id, author) for author in User.objects.filter(id__in=pk_set)]
+
+    for owner_id, author in pairs:
+        if action == "post_add":
+            Timeline.add_user_posts(owner_id, author)
+        else:
+            Timeline.remove_user_posts(owner_id, author.id)
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def image_changed(instance: Image, **kwargs):
+    """
+    Invalidates cached post card when post image is added or deleted
+
+    Args:
+        instance: image instance
+    """
+    Post.bump_versions(id=instance.post_id)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def tags_changed(instance, action: str, pk_set: set, **kwargs):
+    """
+    Invalidates cached post card when post tags are changed
+
+    Args:
+        instance: object which tags are changed
+        action: type of the update
+        pk_set: ids of added or removed tags
+    """
+    if isinstance(instance, Post) and action in ("post_add", "post_remove", "post_clear") and pk_set != set():
+        Post.bump_versions(id=instance.id)
+
+
+@receiver(post_save, sender=TaggedPost)
+def tag_added(instance: TaggedPost, created: bool, **kwargs):
+    """
+    Increments number of posts with the tag
+
+    Args:
+        instance: tagged post instance
+        created: True if tag is added to the post
+    """
+    if created:
+        TagPostsCount.change_count(instance.tag_id, 1)
+
+
+@receiver(post_delete, sender=TaggedPost)
+def tag_removed(instance: TaggedPost, **kwargs):
+    """
+    Decrements number of posts with the tag
+
+    Args:
+        instance: tagged post instance
+    """
+    TagPostsCount.change_count(instance.tag_id, -1)
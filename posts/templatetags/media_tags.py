@@ -0,0 +1,20 @@
+from cloudinary import CloudinaryResource
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def media_image(resource: CloudinaryResource, **options) -> str:
+    """Returns <img> tag of the stored image or of its derivative
+
+    Args:
+        resource: image stored in media storage
+        options: transformation options, e.g. width, height, crop
+    """
+    if not resource:
+        return ""
+    attributes = {key: options[key] for key in ("width", "height") if key in options}
+    return format_html('<img src="{}"{}/>', resource.build_url(**options),
+                       format_html_join("", ' {}="{}"', attributes.items()))
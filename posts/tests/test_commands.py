@@ -0,0 +1,69 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from db.scripts.helper_functions import like_unlike_object
+from test_utils.utils import create_test_users
+from users.models import Post, Image, User
+
+
+class RecountLikesCommandTest(TestCase):
+    """Tests for recount_likes command"""
+    @classmethod
+    def setUpTestData(cls):
+        # Create test users, post and image
+        cls.user1, cls.user2 = create_test_users()
+        cls.post = Post.objects.create(user=cls.user2, content="My post")
+        cls.image = Image.objects.create(post=cls.post, image="test.jpg")
+
+    def test_drifted_likes_count_is_fixed(self):
+        """Ensure that command fixes likes count that differs from likes table"""
+        like_unlike_object(self.post, self.user1)
+        # Likes added without updating the counters
+        self.post.likes.add(self.user2)
+        self.image.likes.add(self.user1, self.user2)
+
+        call_command("recount_likes", stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.image.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        self.assertEqual(self.image.likes_count, 2)
+
+
+class ResolvePendingPostsCommandTest(TestCase):
+    """Tests for resolve_pending_posts command"""
+
+    def test_only_stale_pending_posts_are_resolved(self):
+        """Ensure that command marks posts pending longer than timeout as ready"""
+        user, _ = create_test_users()
+        stale_post = Post.objects.create(user=user, status=Post.Status.PENDING,
+                                         created_at=timezone.now() - timedelta(hours=1))
+        recent_post = Post.objects.create(user=user, status=Post.Status.PENDING)
+
+        call_command("resolve_pending_posts", "--minutes", "30", stdout=StringIO())
+
+        stale_post.refresh_from_db()
+        recent_post.refresh_from_db()
+        self.assertEqual(stale_post.status, Post.Status.READY)
+        self.assertEqual(recent_post.status, Post.Status.PENDING)
+
+
+class RecountFollowersCommandTest(TestCase):
+    """Tests for recount_followers command"""
+
+    def test_drifted_followers_count_is_fixed(self):
+        """Ensure that command fixes followers count that differs from follows table"""
+        user1, user2 = create_test_users()
+        user1.following.add(user2)
+        User.objects.filter(id__in=[user1.id, user2.id]).update(followers_count=5)
+
+        call_command("recount_followers", stdout=StringIO())
+
+        user1.refresh_from_db()
+        user2.refresh_from_db()
+        self.assertEqual(user1.followers_count, 0)
+        self.assertEqual(user2.followers_count, 1)
@@ -1,5 +1,9 @@
+from PIL import Image as PillowImage
 from django.contrib.messages import get_messages
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.constants import (
@@ -14,11 +18,19 @@ from posts.constants import (
     FEED_POST_PREVIEW_TEMPLATE, POSTS_FEED_URL
 )
 from users.models import Post, Image
-from test_utils.utils import create_test_user, create_test_users, create_posts
+from test_utils.utils import (
+    create_test_user, create_test_users, create_test_user_without_data, create_posts,
+    create_test_image, use_temporary_media_storage
+)
+from utils.constants import CURSOR_NEXT
+from utils.pagination import CursorPaginator
+from utils.storage import get_storage
 
 # User ID that is not used in test cases
 OTHER_USER_ID = 9
 OTHER_USERS_POST_ID = 9
+# Object ID that doesn't exist in test cases
+NOT_EXISTING_ID = 999
 # Posts per page
 POSTS_PER_PAGE = 10
 # Number of posts to be created by user
@@ -95,6 +107,41 @@ class CreatePostViewTest(TestCase):
         # ensure user has only one post
         self.assertEqual(Post.objects.filter(user=self.user).count(), 1)
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_images_are_uploaded_in_background(self):
+        """Ensure that post is pending until its images are uploaded after response"""
+        use_temporary_media_storage(self)
+        images = [create_test_image(f"image{size}.png", (size, size)) for size in (10, 20)]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse("posts:create", args=[self.user.id]),
+                             data={"content": "Test Post", "images": images})
+        post = Post.objects.get(user=self.user)
+        self.assertTrue(post.is_pending())
+        self.assertFalse(post.images.exists())
+
+        for callback in callbacks:
+            callback()
+        post.refresh_from_db()
+        self.assertFalse(post.is_pending())
+        # Images are created in the order of files
+        stored_images = [PillowImage.open(get_storage().get_path(image.image)) for image in post.images.order_by("id")]
+        self.assertEqual([image.width for image in stored_images], [10, 20])
+
+    def test_post_page_renders_derivatives(self):
+        """Ensure that resized copies of the images are served by local storage"""
+        use_temporary_media_storage(self)
+        post = Post.objects.create(user=self.user, content="Test Post")
+        Image.objects.create(post=post, image=create_test_image("image.png", (600, 400)))
+
+        response = self.client.get(reverse("posts:post", args=[self.user.id, post.id]))
+        self.assertContains(response, 'width="300" height="200"')
+        image = post.images.get()
+        derivative_url = get_storage().url(image.image, width=300, height=200, crop="pad", background="grey")
+        self.assertContains(response, derivative_url)
+        self.assertEqual(PillowImage.open(get_storage().root / derivative_url.removeprefix("/media/")).size,
+                         (300, 200))
+
 
 class GetPostViewTest(TestCase):
     """Tests for GetPostView"""
@@ -146,6 +193,20 @@ class UpdatePostViewTest(TestCase):
         response = self.client.get(reverse("posts:update", args=[self.user.id, self.post.id]))
         self.assertTemplateUsed(response, UPDATE_POST_TEMPLATE)
 
+    def test_post_is_loaded_once(self):
+        """Ensure that post loaded by permission check is reused by the view"""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse("posts:update", args=[self.user.id, self.post.id]))
+        post_queries = [query for query in context.captured_queries
+                        if query["sql"].startswith("SELECT") and 'FROM "posts"' in query["sql"]]
+        self.assertEqual(len(post_queries), 1)
+
+    def test_user_cant_access_other_user_post(self):
+        """Ensure that user can't update post of other user"""
+        other_post = Post.objects.create(user=create_test_user_without_data(), content="Other post")
+        response = self.client.get(reverse("posts:update", args=[self.user.id, other_post.id]))
+        self.assertEqual(response.status_code, 302)
+
     def test_user_can_update_profile(self):
         """Ensure that user can update post"""
         response = self.client.post(
@@ -229,6 +290,217 @@ class PostFeedViewTest(TestCase):
         response = self.client.get(reverse("posts:feed"))
         self.assertTemplateUsed(response, FEED_POST_TEMPLATE)
 
+    def test_cursor_pagination(self):
+        """Ensure that pages are not shifted by posts created between requests"""
+        response = self.client.get(reverse("posts:feed"))
+        first_page = response.context["posts"]
+        self.assertEqual(len(first_page), POSTS_PER_PAGE)
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+        # New post is created before user opens the next page
+        create_posts(1, self.user2)
+
+        response = self.client.get(reverse("posts:feed"),
+                                    {"cursor": response.context["page_obj"].next_cursor})
+        second_page = response.context["posts"]
+        self.assertEqual(len(second_page), NUMBER_OF_POSTS - POSTS_PER_PAGE)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertFalse(response.context["page_obj"].has_next())
+
+        # Ensure that previous page is the first page without new post
+        response = self.client.get(reverse("posts:feed"),
+                                   {"cursor": response.context["page_obj"].previous_cursor})
+        self.assertEqual(response.context["posts"], first_page)
+        self.assertTrue(response.context["page_obj"].has_previous())
+
+    def test_updated_post_card_is_rendered(self):
+        """Ensure that cached post card is not displayed after post update"""
+        cache.clear()
+        post = Post.objects.filter(user=self.user1).first()
+        self.assertContains(self.client.get(reverse("posts:feed")), post.content)
+
+        post.content = "Updated post"
+        post.save()
+        self.assertContains(self.client.get(reverse("posts:feed")), "Updated post")
+
+    def test_invalid_cursor(self):
+        """Ensure that invalid cursor returns 404"""
+        response = self.client.get(reverse("posts:feed"), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_values_of_wrong_type(self):
+        """Ensure that well-formed cursor with values of wrong type returns 404"""
+        for values in ([{"a": 1}, 1], [None, 1], ["2026-01-01T00:00:00+00:00", [1]]):
+            cursor = CursorPaginator.encode_cursor(CURSOR_NEXT, values)
+            response = self.client.get(reverse("posts:feed"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 404)
+
+
+class PostFeedApiViewTest(TestCase):
+    """Tests for PostFeedApiView"""
+    @classmethod
+    def setUpTestData(cls):
+        # Create test users and posts
+        cls.user1, cls.user2 = create_test_users()
+        create_posts(NUMBER_OF_POSTS, cls.user2)
+
+    def setUp(self):
+        # Login user for all tests
+        self.client.force_login(self.user1)
+
+    def test_feed_pages(self):
+        """Ensure that feed pages are returned as JSON with cursor"""
+        response = self.client.get(reverse("posts:feed_api"))
+        data = response.json()
+        self.assertEqual(len(data["results"]), POSTS_PER_PAGE)
+
+        response = self.client.get(reverse("posts:feed_api"), {"cursor": data["next_cursor"]})
+        data2 = response.json()
+        ids = {post["id"] for post in data["results"] + data2["results"]}
+        self.assertEqual(len(ids), NUMBER_OF_POSTS)
+        self.assertIsNone(data2["next_cursor"])
+
+    def test_not_modified(self):
+        """Ensure that 304 is returned until posts on the page are changed"""
+        response = self.client.get(reverse("posts:feed_api"))
+        etag = response.headers["ETag"]
+        self.assertNotIn("Last-Modified", response.headers)
+
+        response = self.client.get(reverse("posts:feed_api"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        post = Post.objects.latest("created_at")
+        post.content = "Updated post"
+        post.save()
+        response = self.client.get(reverse("posts:feed_api"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_deleted_post_changes_etag(self):
+        """Ensure that page is not answered with 304 after its newest post is deleted"""
+        response = self.client.get(reverse("posts:feed_api"))
+        etag = response.headers["ETag"]
+
+        Post.objects.latest("created_at").delete()
+        response = self.client.get(reverse("posts:feed_api"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_cursor(self):
+        """Ensure that 404 is returned for invalid cursor"""
+        response = self.client.get(reverse("posts:feed_api"), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, 404)
+
+
+class FollowingFeedViewTest(TestCase):
+    """Tests for FollowingFeedView"""
+    @classmethod
+    def setUpTestData(cls):
+        # Create test users and posts, user1 follows user2
+        cls.user1, cls.user2 = create_test_users()
+        cls.user1.following.add(cls.user2)
+
+        # Posts are written to followers timelines by background task
+        with override_settings(BACKGROUND_TASKS_EAGER=True), cls.captureOnCommitCallbacks(execute=True):
+            create_posts(NUMBER_OF_POSTS, cls.user2)
+        cls.not_followed_post = Post.objects.create(user=create_test_user(), content="Post")
+
+    def setUp(self):
+        # Login user for all tests
+        self.client.force_login(self.user1)
+
+    def test_view_uses_correct_template(self):
+        """Ensure that url uses correct template"""
+        response = self.client.get(reverse("posts:following_feed"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, FEED_POST_TEMPLATE)
+
+    def test_feed_contains_only_followed_users_posts(self):
+        """Ensure that feed is paginated and contains posts of followed users"""
+        response = self.client.get(reverse("posts:following_feed"))
+        posts = list(response.context["posts"])
+        self.assertEqual(len(posts), POSTS_PER_PAGE)
+
+        response = self.client.get(reverse("posts:following_feed"),
+                                   {"cursor": response.context["page_obj"].next_cursor})
+        posts += response.context["posts"]
+        self.assertEqual(len(posts), NUMBER_OF_POSTS)
+        self.assertEqual({post.user for post in posts}, {self.user2})
+
+
+class TagFeedViewTest(TestCase):
+    """Tests for TagFeedView"""
+    @classmethod
+    def setUpTestData(cls):
+        # Create test users and posts, all posts of user2 are tagged
+        cls.user1, cls.user2 = create_test_users()
+        create_posts(NUMBER_OF_POSTS, cls.user2)
+        for post in Post.objects.filter(user=cls.user2):
+            post.tags.add("python")
+        cls.not_tagged_post = Post.objects.create(user=cls.user1, content="Post")
+
+    def setUp(self):
+        # Login user for all tests
+        self.client.force_login(self.user1)
+
+    def test_view_uses_correct_template(self):
+        """Ensure that url uses correct template"""
+        response = self.client.get(reverse("posts:tag_feed", args=["python"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, FEED_POST_TEMPLATE)
+        self.assertEqual(response.context["feed_title"], f"#python ({NUMBER_OF_POSTS} posts)")
+
+    def test_feed_contains_only_tagged_posts(self):
+        """Ensure that feed is paginated and contains posts with the tag"""
+        response = self.client.get(reverse("posts:tag_feed", args=["python"]))
+        posts = list(response.context["posts"])
+        self.assertEqual(len(posts), POSTS_PER_PAGE)
+
+        response = self.client.get(reverse("posts:tag_feed", args=["python"]),
+                                   {"cursor": response.context["page_obj"].next_cursor})
+        posts += response.context["posts"]
+        self.assertEqual(len(posts), NUMBER_OF_POSTS)
+        self.assertEqual({post.user for post in posts}, {self.user2})
+
+    def test_unknown_tag(self):
+        """Ensure that 404 is returned for tag that doesn't exist"""
+        response = self.client.get(reverse("posts:tag_feed", args=["unknown"]))
+        self.assertEqual(response.status_code, 404)
+
+
+class PostSearchViewTest(TestCase):
+    """Tests for PostSearchView and PostSearchApiView"""
+    @classmethod
+    def setUpTestData(cls):
+        # Create test users and posts
+        cls.user1, cls.user2 = create_test_users()
+        cls.post = Post.objects.create(user=cls.user2, content="Sunset over the sea")
+        cls.other_post = Post.objects.create(user=cls.user2, content="Mountains")
+
+    def setUp(self):
+        # Login user for all tests
+        self.client.force_login(self.user1)
+
+    def test_view_uses_correct_template(self):
+        """Ensure that url uses correct template and shows matching posts"""
+        response = self.client.get(reverse("posts:search"), {"q": "sunset"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, FEED_POST_TEMPLATE)
+        self.assertEqual(list(response.context["posts"]), [self.post])
+
+    def test_empty_query(self):
+        """Ensure that nothing is found by empty query"""
+        response = self.client.get(reverse("posts:search"), {"q": " "})
+        self.assertEqual(list(response.context["posts"]), [])
+
+    def test_search_api(self):
+        """Ensure that matching posts are returned as JSON"""
+        response = self.client.get(reverse("posts:search_api"), {"q": "sunset"})
+        results = response.json()["results"]
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["id"], self.post.id)
+        self.assertEqual(results[0]["content"], self.post.content)
+        self.assertEqual(results[0]["author"]["id"], self.user2.id)
+
 
 class SinglePostFeedViewTest(TestCase):
     """Tests for PostFeedView"""
@@ -281,11 +553,66 @@ class PostLikeViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(self.post.likes.count(), 1)
         self.assertTrue(self.user1 in self.post.likes.all())
+        self.assertEqual(response.json(), {"likes_count": 1, "liked": True})
 
         # Ensure that user can unlike the post
         response = self.client.get(reverse("posts:like", args=[self.post.id]))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(self.post.likes.count(), 0)
+        self.assertEqual(response.json(), {"likes_count": 0, "liked": False})
+
+
+class BatchLikeViewTest(TestCase):
+    """Tests for BatchLikeView"""
+    @classmethod
+    def setUpTestData(cls):
+        # Create test users, posts and image
+        cls.user1, cls.user2 = create_test_users()
+
+        cls.post = Post.objects.create(user=cls.user2, content="My post")
+        cls.liked_post = Post.objects.create(user=cls.user2, content="Liked post")
+        cls.image = Image.objects.create(post=cls.post, image="test.jpg")
+        cls.liked_post.likes.add(cls.user1)
+        Post.objects.filter(id=cls.liked_post.id).update(likes_count=1)
+
+    def setUp(self):
+        # Login user for all tests
+        self.client.force_login(self.user1)
+
+    def post_likes(self, likes: list):
+        """Sends batch of likes"""
+        return self.client.post(reverse("posts:batch_like"), {"likes": likes}, content_type="application/json")
+
+    def test_batch_of_likes(self):
+        """Ensure that likes are applied and owners are notified"""
+        response = self.post_likes([
+            {"type": "post", "id": self.post.id, "liked": False},
+            {"type": "post", "id": self.post.id, "liked": True},
+            {"type": "post", "id": self.liked_post.id, "liked": False},
+            {"type": "image", "id": self.image.id, "liked": True},
+            {"type": "image", "id": NOT_EXISTING_ID, "liked": True},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(response.json()["results"], [
+            {"type": "post", "id": self.post.id, "liked": True, "likes_count": 1},
+            {"type": "post", "id": self.liked_post.id, "liked": False, "likes_count": 0},
+            {"type": "image", "id": self.image.id, "liked": True, "likes_count": 1},
+        ])
+        self.assertEqual(list(self.post.likes.all()), [self.user1])
+        self.assertFalse(self.liked_post.likes.exists())
+        self.assertEqual(self.user2.notifications.count(), 2)
+
+        # Repeated batch doesn't change anything
+        response = self.post_likes([{"type": "post", "id": self.post.id, "liked": True}])
+        self.assertEqual(response.json()["results"],
+                         [{"type": "post", "id": self.post.id, "liked": True, "likes_count": 1}])
+        self.assertEqual(self.user2.notifications.count(), 2)
+
+    def test_invalid_batch(self):
+        """Ensure that invalid batch is rejected"""
+        response = self.post_likes([{"type": "user", "id": self.user2.id, "liked": True}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.post.likes.exists())
 
 
 class ImageLikeViewTest(TestCase):
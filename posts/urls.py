@@ -4,7 +4,8 @@ from django.urls import path
 from .views import (
     GetPostView, CreatePostView, PostListView, DeletePostView,
     UpdatePostView, PostFeedView, SinglePostFeedView,
-    PostLikeView, ImageLikeView
+    PostLikeView, ImageLikeView, FollowingFeedView, TagFeedView,
+    PostSearchView, PostSearchApiView, PostFeedApiView, BatchLikeView
 )
 
 app_name = "posts"
@@ -16,7 +17,13 @@ urlpatterns = [
     path("profile/<int:user_id>/post/delete/<int:post_id>", DeletePostView.as_view(), name="delete"),
     path("profile/<int:user_id>/posts/", PostListView.as_view(), name="posts"),
     path("feed/", PostFeedView.as_view(), name="feed"),
+    path("feed/api", PostFeedApiView.as_view(), name="feed_api"),
+    path("feed/following", FollowingFeedView.as_view(), name="following_feed"),
+    path("feed/tag/<str:tag_slug>", TagFeedView.as_view(), name="tag_feed"),
+    path("search/", PostSearchView.as_view(), name="search"),
+    path("search/api", PostSearchApiView.as_view(), name="search_api"),
     path("feed/<int:post_id>", SinglePostFeedView.as_view(), name="feed_post"),
     path("feed/<int:post_id>/like", PostLikeView.as_view(), name="like"),
+    path("feed/likes", BatchLikeView.as_view(), name="batch_like"),
     path("feed/<int:post_id>/image_like", ImageLikeView.as_view(), name="image_like"),
 ]
@@ -0,0 +1 @@
+"""Module for posts app utilities"""
@@ -0,0 +1,29 @@
+"""Module for converting posts to JSON serializable data"""
+from django.urls import reverse
+
+from posts.constants import SINGLE_POST_FEED_URL, TAG_FEED_URL, COVER_IMAGE_OPTIONS
+from users.constants import USER_PAGE_URL
+from users.models import Post
+
+
+def serialize_post(post: Post) -> dict:
+    """Converts post loaded by Post.get_posts to dictionary
+
+    Args:
+        post: post annotated with cover image, with prefetched tags
+    """
+    return {
+        "id": post.id,
+        "content": post.content,
+        "url": reverse(SINGLE_POST_FEED_URL, args=[post.id]),
+        "cover_image": post.cover_image.build_url(**COVER_IMAGE_OPTIONS) if post.cover_image else None,
+        "tags": [{"name": tag.name, "url": reverse(TAG_FEED_URL, args=[tag.slug])} for tag in post.tags.all()],
+        "author": {
+            "id": post.user.id,
+            "full_name": post.user.get_full_name(),
+            "url": reverse(USER_PAGE_URL, args=[post.user.id]),
+        },
+        "likes_count": post.likes_count,
+        "status": post.status,
+        "created_at": post.created_at.isoformat(),
+    }
@@ -1,21 +1,25 @@
 """Module for posts views"""
+import hashlib
+import json
 import logging
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import OperationalError
-from django.http import JsonResponse
-from django.shortcuts import redirect
-from django.urls import reverse_lazy
+from django.db import OperationalError, transaction
+from django.db.models import prefetch_related_objects
+from django.http import JsonResponse, Http404
+from django.shortcuts import redirect, get_object_or_404
+from django.urls import reverse_lazy, reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.views import View
 from django.views.generic import (
     ListView, DeleteView, DetailView, CreateView, UpdateView
 )
-from django.conf import settings
-from reretry import retry
+from taggit.models import Tag
 
 from authenticator.utils.mixins import AccessRequiredMixin, PostAccessMixin
-from db.scripts.helper_functions import like_unlike_object
+from db.scripts.helper_functions import like_unlike_object, like_unlike_objects
 from notify.constants import (
     NOTIFY_LIKE_IMAGE, NOTIFY_LIKE_POST, ERROR_WHILE_CREATING_LIKE_OBJECT_NOTIFICATION
 )
@@ -25,19 +29,24 @@ from posts.constants import (
     POST_CONFIRM_DELETE_TEMPLATE, POST_LIST_TEMPLATE,
     SINGLE_POST_TEMPLATE, POST_CREATED_MSG,
     CREATE_POST_TEMPLATE, UPDATE_POST_TEMPLATE,
-    FEED_POST_TEMPLATE, FEED_POST_PREVIEW_TEMPLATE, SINGLE_POST_FEED_URL
+    FEED_POST_TEMPLATE, FEED_POST_PREVIEW_TEMPLATE, SINGLE_POST_FEED_URL,
+    POSTS_PER_PAGE, LATEST_POSTS_TITLE, FOLLOWING_POSTS_TITLE,
+    TAG_POSTS_TITLE, TAG_SLUG, SEARCH_POSTS_TITLE, SEARCH_QUERY,
+    LIKES_BATCH_LIMIT, INVALID_LIKES_BATCH_MSG, POST_NOT_FOUND_MSG
 )
 from posts.forms import CreatePostForm, UpdatePostForm
-from users.constants import TRIES, DELAY
-from users.models import Image, Post
+from posts.utils.serializers import serialize_post
+from users.models import Image, Post, Timeline, TagPostsCount
+from utils.constants import CURSOR
+from utils.pagination import CursorPaginationMixin, CursorPaginator, InvalidCursor
 
 logger = logging.getLogger(__name__)
 
 
-class PostListView(LoginRequiredMixin, AccessRequiredMixin, ListView):
+class PostListView(LoginRequiredMixin, AccessRequiredMixin, CursorPaginationMixin, ListView):
     """View for displaying user posts"""
     model = Post
-    paginate_by = settings.PAGINATE_BY
+    paginate_by = POSTS_PER_PAGE
     context_object_name = "posts"
     template_name = POST_LIST_TEMPLATE
 
@@ -54,11 +63,15 @@ class CreatePostView(LoginRequiredMixin, AccessRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
+        images = self.request.FILES.getlist("images")
+        if images:
+            # Post is shown without images until they are uploaded
+            form.instance.status = Post.Status.PENDING
         response = super().form_valid(form)
 
-        # Add images after creating post
-        Image.create_images(self.object,
-                            self.request.FILES.getlist("images"))
+        # Upload images after creating post
+        if images:
+            Image.create_images_in_background(self.object, images)
 
         messages.success(self.request, POST_CREATED_MSG)
         return response
@@ -74,8 +87,8 @@ class GetPostView(LoginRequiredMixin, PostAccessMixin, DetailView):
     pk_url_kwarg = POST_ID
     template_name = SINGLE_POST_TEMPLATE
 
-    def get_object(self):
-        return Post.get_post(self.kwargs.get("post_id"))
+    def get_post_queryset(self):
+        return Post.get_posts_with_details(user=self.request.user)
 
 
 class UpdatePostView(LoginRequiredMixin, PostAccessMixin, UpdateView):
@@ -106,10 +119,10 @@ class DeletePostView(LoginRequiredMixin, PostAccessMixin, DeleteView):
         return reverse_lazy(POSTS_FEED_URL, args=[self.request.user.id])
 
 
-class PostFeedView(LoginRequiredMixin, ListView):
+class PostFeedView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """View for displaying all posts in the feed"""
     model = Post
-    paginate_by = settings.PAGINATE_BY
+    paginate_by = POSTS_PER_PAGE
     context_object_name = "posts"
     template_name = FEED_POST_TEMPLATE
 
@@ -117,6 +130,111 @@ class PostFeedView(LoginRequiredMixin, ListView):
         """Get user posts"""
         return Post.get_posts()
 
+    def get_context_data(self, **kwargs):
+        data = super().get_context_data(**kwargs)
+        data["feed_title"] = LATEST_POSTS_TITLE
+        data["feed_api_url"] = reverse("posts:feed_api")
+        return data
+
+
+class PostFeedApiView(LoginRequiredMixin, View):
+    """
+    Returns page of the feed as JSON post cards with cursor of the next page
+
+    Response has ETag (built from ids and versions of the posts on the page
+    and the next cursor), so unchanged page is answered with 304 before the
+    rest of the page data is loaded. Last-Modified is not sent, as deleted
+    post doesn't change modification time of the remaining posts.
+    """
+
+    def get(self, request):
+        paginator = CursorPaginator(Post.get_posts().prefetch_related(None), POSTS_PER_PAGE)
+        try:
+            page = paginator.page(request.GET.get(CURSOR))
+        except InvalidCursor as error:
+            raise Http404(str(error))
+
+        posts = page.object_list
+        etag = hashlib.md5(";".join([*(f"{post.id}:{post.version}" for post in posts),
+                                     page.next_cursor or ""]).encode()).hexdigest()
+
+        response = get_conditional_response(request, etag=quote_etag(etag))
+        if response is None:
+            prefetch_related_objects(posts, "tags")
+            response = JsonResponse({
+                "results": [serialize_post(post) for post in posts],
+                "next_cursor": page.next_cursor,
+            })
+
+        response.headers["ETag"] = quote_etag(etag)
+        # Browser must revalidate the page on every request
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class FollowingFeedView(LoginRequiredMixin, CursorPaginationMixin, ListView):
+    """View for displaying posts of followed users"""
+    paginate_by = POSTS_PER_PAGE
+    context_object_name = "posts"
+    template_name = FEED_POST_TEMPLATE
+    cursor_keys = ("feed_created_at", "feed_id")
+
+    def get_queryset(self):
+        """Get posts from the user timeline"""
+        return Timeline.get_timeline_posts(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        data = super().get_context_data(**kwargs)
+        data["feed_title"] = FOLLOWING_POSTS_TITLE
+        return data
+
+
+class TagFeedView(LoginRequiredMixin, CursorPaginationMixin, ListView):
+    """View for displaying posts with specific tag"""
+    paginate_by = POSTS_PER_PAGE
+    context_object_name = "posts"
+    template_name = FEED_POST_TEMPLATE
+    cursor_keys = ("feed_created_at", "feed_id")
+
+    def get_queryset(self):
+        """Get posts with the tag from url"""
+        self.tag = get_object_or_404(Tag, slug=self.kwargs[TAG_SLUG])
+        return Post.get_tag_posts(self.tag)
+
+    def get_context_data(self, **kwargs):
+        data = super().get_context_data(**kwargs)
+        data["feed_title"] = TAG_POSTS_TITLE.format(name=self.tag.name,
+                                                    count=TagPostsCount.get_count(self.tag.id))
+        return data
+
+
+class PostSearchView(LoginRequiredMixin, ListView):
+    """View for displaying posts matching search query"""
+    context_object_name = "posts"
+    template_name = FEED_POST_TEMPLATE
+
+    def get_queryset(self):
+        """Get most relevant posts, nothing if query is empty"""
+        self.query = self.request.GET.get(SEARCH_QUERY, "").strip()
+        if not self.query:
+            return Post.objects.none()
+        return Post.search_posts(self.query)
+
+    def get_context_data(self, **kwargs):
+        data = super().get_context_data(**kwargs)
+        data["feed_title"] = SEARCH_POSTS_TITLE.format(query=self.query)
+        data["search_query"] = self.query
+        return data
+
+
+class PostSearchApiView(LoginRequiredMixin, View):
+    """Returns posts matching search query as JSON"""
+
+    def get(self, request):
+        query = request.GET.get(SEARCH_QUERY, "").strip()
+        posts = Post.search_posts(query) if query else []
+        return JsonResponse({"results": [serialize_post(post) for post in posts]})
+
 
 class SinglePostFeedView(LoginRequiredMixin, DetailView):
     """Feed single post view"""
@@ -124,26 +242,26 @@ class SinglePostFeedView(LoginRequiredMixin, DetailView):
     pk_url_kwarg = POST_ID
     template_name = FEED_POST_PREVIEW_TEMPLATE
 
+    def get_object(self):
+        try:
+            return Post.get_post(self.kwargs.get(POST_ID), user=self.request.user)
+        except Post.DoesNotExist:
+            raise Http404(POST_NOT_FOUND_MSG.format(self.kwargs.get(POST_ID)))
+
     def get_context_data(self, **kwargs):
         data = super().get_context_data(**kwargs)
-
-        post = Post.get_post(self.kwargs.get("post_id"))
-        liked = False
-        if post.likes.filter(id=self.request.user.id).exists():
-            liked = True
-
-        data["post_likes_count"] = post.likes.count()
-        data["post_liked"] = liked
+        data["post_likes_count"] = self.object.likes_count
+        data["post_liked"] = self.object.liked
         return data
 
 
 class PostLikeView(LoginRequiredMixin, View):
     """Represents a feature that allows users to like or unlike a post"""
 
-    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    # Toggle is not idempotent, so request is not retried
     def get(self, request, post_id):
         user = request.user
-        post = Post.objects.prefetch_related("likes", "user").get(id=post_id)
+        post = Post.objects.select_related("user").only("id", "user").get(id=post_id)
 
         # Like/unlike post
         liked = like_unlike_object(post, user)
@@ -152,11 +270,10 @@ class PostLikeView(LoginRequiredMixin, View):
             # Create notification only if other user post is liked
             if user != post.user:
                 try:
-                    Notification.create_notification(actor=user,
-                                                     target_content_type=Post.__name__.lower(),
-                                                     target_object_id=post.id,
-                                                     verb=NOTIFY_LIKE_POST,
-                                                     recipient=post.user)
+                    Notification.create_target_notifications(actor=user,
+                                                             target_content_type=Post.__name__.lower(),
+                                                             verb=NOTIFY_LIKE_POST,
+                                                             targets={post.id: post.user_id})
                 except OperationalError:
                     logger.exception(ERROR_WHILE_CREATING_LIKE_OBJECT_NOTIFICATION.format(
                         Post.__name__.lower(),
@@ -164,7 +281,7 @@ class PostLikeView(LoginRequiredMixin, View):
                     ))
 
         response = {
-            "likes_count": post.likes.count(),
+            "likes_count": post.likes_count,
             "liked": liked
         }
 
@@ -177,7 +294,7 @@ class ImageLikeView(LoginRequiredMixin, View):
     a single image from the post
     """
 
-    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    # Toggle is not idempotent, so request is not retried
     def get(self, request, post_id):
         user = request.user
 
@@ -190,7 +307,7 @@ class ImageLikeView(LoginRequiredMixin, View):
             return redirect(SINGLE_POST_FEED_URL, post_id=post_id)
 
         try:
-            image = Image.objects.prefetch_related("likes", "post__user").get(id=image_id)
+            image = Image.objects.select_related("post__user").only("id", "post__user").get(id=image_id)
         except Image.DoesNotExist:
             return redirect(SINGLE_POST_FEED_URL, post_id=post_id)
 
@@ -201,11 +318,10 @@ class ImageLikeView(LoginRequiredMixin, View):
             # Create notification only if other user image is liked
             if user != image.post.user:
                 try:
-                    Notification.create_notification(actor=user,
-                                                     target_content_type=Image.__name__.lower(),
-                                                     target_object_id=image.id,
-                                                     verb=NOTIFY_LIKE_IMAGE,
-                                                     recipient=image.post.user)
+                    Notification.create_target_notifications(actor=user,
+                                                             target_content_type=Image.__name__.lower(),
+                                                             verb=NOTIFY_LIKE_IMAGE,
+                                                             targets={image.id: image.post.user_id})
                 except OperationalError:
                     logger.exception(ERROR_WHILE_CREATING_LIKE_OBJECT_NOTIFICATION.format(
                         Image.__name__.lower(),
@@ -213,8 +329,88 @@ class ImageLikeView(LoginRequiredMixin, View):
                     ))
 
         response = {
-            "likes_count": image.likes.count(),
+            "likes_count": image.likes_count,
             "liked": liked
         }
 
         return JsonResponse(response)
+
+
+class BatchLikeView(LoginRequiredMixin, View):
+    """
+    Represents a feature that allows users to like or unlike many posts
+    and images with one request, e.g. likes queued by offline client
+
+    Request body is JSON object {"likes": [{"type": "post", "id": 1, "liked": true}, ...]},
+    if the same object is listed several times, the last state is applied.
+    """
+    models = {Post.__name__.lower(): Post, Image.__name__.lower(): Image}
+    notification_verbs = {Post: NOTIFY_LIKE_POST, Image: NOTIFY_LIKE_IMAGE}
+    owner_fields = {Post: "user_id", Image: "post__user_id"}
+
+    def post(self, request):
+        try:
+            likes = self.parse_likes(request.body)
+        except ValueError:
+            return JsonResponse({"error": INVALID_LIKES_BATCH_MSG.format(LIKES_BATCH_LIMIT)}, status=400)
+
+        user = request.user
+        states = {}
+        added = {}
+        with transaction.atomic():
+            for model in self.models.values():
+                model_likes = likes.get(model, {})
+                states[model], added[model] = like_unlike_objects(
+                    model, user,
+                    like_ids=[object_id for object_id, liked in model_likes.items() if liked],
+                    unlike_ids=[object_id for object_id, liked in model_likes.items() if not liked]
+                )
+
+        for model, added_ids in added.items():
+            self.notify_owners(model, added_ids)
+
+        response = {
+            "results": [
+                {"type": model.__name__.lower(), "id": object_id, "liked": liked, "likes_count": likes_count}
+                for model, model_states in states.items()
+                for object_id, (liked, likes_count) in model_states.items()
+            ]
+        }
+        return JsonResponse(response)
+
+    def parse_likes(self, body: bytes) -> dict:
+        """Returns dictionary {model: {object_id: liked}} from request body
+
+        Raises:
+            ValueError: if body is not valid batch of likes
+        """
+        data = json.loads(body)
+        if not isinstance(data, dict) or not isinstance(data.get("likes"), list) \
+                or len(data["likes"]) > LIKES_BATCH_LIMIT:
+            raise ValueError(data)
+
+        likes = {}
+        for like in data["likes"]:
+            if not isinstance(like, dict) or like.get("type") not in self.models \
+                    or type(like.get("id")) is not int or not isinstance(like.get("liked"), bool):
+                raise ValueError(like)
+            likes.setdefault(self.models[like["type"]], {})[like["id"]] = like["liked"]
+        return likes
+
+    def notify_owners(self, model, object_ids: set):
+        """Creates notifications for owners of newly liked objects, except the user"""
+        if not object_ids:
+            return
+        try:
+            targets = dict(model.objects.filter(id__in=object_ids)
+                           .exclude(**{self.owner_fields[model]: self.request.user.id})
+                           .values_list("id", self.owner_fields[model]))
+            Notification.create_target_notifications(actor=self.request.user,
+                                                     target_content_type=model.__name__.lower(),
+                                                     verb=self.notification_verbs[model],
+                                                     targets=targets)
+        except OperationalError:
+            logger.exception(ERROR_WHILE_CREATING_LIKE_OBJECT_NOTIFICATION.format(
+                model.__name__.lower(),
+                sorted(object_ids)
+            ))
@@ -1,4 +1,12 @@
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image as PillowImage
+
 from users.models import User, Post
+from utils.constants import LOCAL_STORAGE
 
 TEST_PASSWORD = "123qwe!@#"
 
@@ -65,3 +73,20 @@ def create_test_users():
 def create_posts(post_num, user):
     for post in range(post_num):
         Post.objects.create(user=user, content=f"Post number {post}")
+
+
+def create_test_image(name: str, size: tuple = (10, 10), exif: PillowImage.Exif = None) -> SimpleUploadedFile:
+    """Returns uploaded image, PNG or JPEG depending on the name"""
+    file = BytesIO()
+    image_format = "PNG" if name.endswith(".png") else "JPEG"
+    PillowImage.new("RGB", size).save(file, image_format, **({"exif": exif} if exif else {}))
+    return SimpleUploadedFile(name, file.getvalue())
+
+
+def use_temporary_media_storage(test_case: TestCase):
+    """Stores media files of the test in local storage in temporary directory"""
+    media_root = tempfile.TemporaryDirectory()
+    test_case.addCleanup(media_root.cleanup)
+    settings_override = override_settings(MEDIA_STORAGE=LOCAL_STORAGE, MEDIA_ROOT=media_root.name)
+    settings_override.enable()
+    test_case.addCleanup(settings_override.disable)
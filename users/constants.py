@@ -40,6 +40,33 @@ IMAGES_FIELD = "images"
 TRIES = 3
 DELAY = 1
 
+# Timeline ("following" feed) parameters
+# Posts of users with at least this number of followers are not written to
+# followers timelines, they are merged into the feed on read instead
+FAN_OUT_FOLLOWERS_LIMIT = 10000
+FAN_OUT_BATCH_SIZE = 1000
+# Number of latest posts added to the timeline when user follows another user
+TIMELINE_BACKFILL_SIZE = 100
+
+# Full-text search of posts
+# Text search configuration of search queries, must match the configuration
+# hardcoded in posts 'search_vector' trigger (users migration 0007)
+SEARCH_CONFIG = "english"
+SEARCH_RESULTS_LIMIT = 50
+
+# Number of images of one post uploaded concurrently
+IMAGE_UPLOAD_WORKERS = 4
+# Minutes after which pending post (e.g. its upload task was lost by restart) is marked as ready
+PENDING_POST_TIMEOUT_MINUTES = 30
+
+# Queue of media files deleted from media storage
+# Number of queued files deleted with one storage call
+MEDIA_DELETION_BATCH_SIZE = 100
+# Number of attempts to delete the file before it is dropped from the queue
+MEDIA_DELETION_TRIES = 5
+# Delay (in seconds) before the second attempt, doubled for every next one
+MEDIA_DELETION_RETRY_DELAY = 60
+
 # Create user constants
 DEFAULT_EMAIL_PREFIX = "random_email"
 STRING_LENGTH = 32
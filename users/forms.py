@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from users.models import User
+from utils.images import process_uploaded_image
 
 
 class UpdateUserForm(forms.ModelForm):
@@ -9,3 +11,10 @@ class UpdateUserForm(forms.ModelForm):
         model = User
         fields = ["name", "surname", "bio", "avatar"]
         widgets = {"bio": forms.Textarea()}
+
+    def clean_avatar(self):
+        """Downscales and re-encodes uploaded avatar"""
+        avatar = self.cleaned_data["avatar"]
+        if isinstance(avatar, UploadedFile):
+            return process_uploaded_image(avatar)
+        return avatar
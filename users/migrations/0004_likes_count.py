@@ -0,0 +1,36 @@
+# Generated by Django 4.1.7 on 2026-10-17 21:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_likes(apps, schema_editor):
+    """Fills likes count of existing posts and images"""
+    for model_name, field_name in (("Post", "post"), ("Image", "image")):
+        model = apps.get_model("users", model_name)
+        likes = model.likes.through.objects.filter(
+            **{field_name: OuterRef("pk")}
+        ).order_by().values(field_name).annotate(count=Count("*")).values("count")
+        model.objects.update(likes_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_likes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.1.7 on 2026-10-17 21:47
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+import django.db.models.deletion
+import taggit.managers
+
+BATCH_SIZE = 1000
+
+
+def move_post_tags(apps, schema_editor):
+    """Moves post tags from generic taggit table to 'tagged_posts' table and counts posts per tag"""
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+    Post = apps.get_model("users", "Post")
+    TaggedPost = apps.get_model("users", "TaggedPost")
+    TagPostsCount = apps.get_model("users", "TagPostsCount")
+
+    content_type = ContentType.objects.filter(app_label="users", model="post").first()
+    if content_type is None:
+        return
+
+    tagged_items = TaggedItem.objects.filter(content_type=content_type)
+    post_created_at = Post.objects.filter(id=OuterRef("object_id")).values("created_at")
+
+    batch = []
+    for tagged_item in tagged_items.annotate(created_at=Subquery(post_created_at)).iterator(chunk_size=BATCH_SIZE):
+        # Skip tags of deleted posts
+        if tagged_item.created_at is None:
+            continue
+        batch.append(TaggedPost(tag_id=tagged_item.tag_id,
+                                content_object_id=tagged_item.object_id,
+                                created_at=tagged_item.created_at))
+        if len(batch) == BATCH_SIZE:
+            TaggedPost.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TaggedPost.objects.bulk_create(batch, ignore_conflicts=True)
+    tagged_items.delete()
+
+    TagPostsCount.objects.bulk_create(
+        TagPostsCount(tag_id=tag_count["tag"], count=tag_count["count"])
+        for tag_count in TaggedPost.objects.order_by().values("tag").annotate(count=Count("*"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0005_auto_20220424_2025'),
+        ('users', '0005_post_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagPostsCount',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='taggit.tag')),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'tag_posts_counts',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaggedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('content_object', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tagged_posts', to='users.post')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_items', to='taggit.tag')),
+            ],
+            options={
+                'db_table': 'tagged_posts',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='tags',
+            field=taggit.managers.TaggableManager(blank=True, help_text='A comma-separated list of tags.', through='users.TaggedPost', to='taggit.Tag', verbose_name='Tags'),
+        ),
+        migrations.AddIndex(
+            model_name='taggedpost',
+            index=models.Index(fields=['tag', '-created_at', '-content_object'], name='tagged_posts_tag_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taggedpost',
+            constraint=models.UniqueConstraint(fields=('tag', 'content_object'), name='tagged_posts_tag_post_unique'),
+        ),
+        migrations.RunPython(move_post_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.1.7 on 2026-10-17 21:49
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    CREATE INDEX posts_search_vector_idx ON posts USING GIN (search_vector);
+
+    CREATE TRIGGER posts_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF content ON posts
+    FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(search_vector, 'pg_catalog.english', content);
+
+    UPDATE posts SET search_vector = to_tsvector('pg_catalog.english', content);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+    DROP TRIGGER IF EXISTS posts_search_vector_trigger ON posts;
+    DROP INDEX IF EXISTS posts_search_vector_idx;
+"""
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    """Creates GIN index and trigger that keeps 'search_vector' in sync with content (PostgreSQL only)"""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_tagged_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_trigger, drop_search_vector_trigger),
+    ]
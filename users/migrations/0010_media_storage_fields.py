@@ -0,0 +1,24 @@
+# Generated by Django 4.1.7 on 2026-10-17 22:01
+
+from django.db import migrations
+import utils.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_post_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='image',
+            name='image',
+            field=utils.storage.MediaField(blank=True, max_length=255, null=True, verbose_name='image'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=utils.storage.MediaField(blank=True, max_length=255, null=True, verbose_name='image'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.7 on 2026-10-17 22:03
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_media_storage_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'media_deletions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='mediadeletion',
+            index=models.Index(fields=['next_attempt_at'], name='media_deletions_next_idx'),
+        ),
+    ]
@@ -1,17 +1,33 @@
 """Module contains users app models"""
 import logging
+import os
 import random
 import string
+from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
-import cloudinary.uploader
-from cloudinary.models import CloudinaryField
+from cloudinary.exceptions import Error as CloudinaryError
 from django.contrib.auth.base_user import BaseUserManager
-from django.db import models, OperationalError
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, models, transaction, IntegrityError, OperationalError
+from django.db.models import Exists, F, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser
 from reretry import retry
 from taggit.managers import TaggableManager
-from users.constants import TRIES, DELAY, DEFAULT_EMAIL_PREFIX, DEFAULT_EMAIL_POSTFIX, STRING_LENGTH
+from taggit.models import Tag, TaggedItemBase
+from users.constants import (
+    TRIES, DELAY, DEFAULT_EMAIL_PREFIX, DEFAULT_EMAIL_POSTFIX, STRING_LENGTH,
+    FAN_OUT_FOLLOWERS_LIMIT, FAN_OUT_BATCH_SIZE, TIMELINE_BACKFILL_SIZE,
+    SEARCH_CONFIG, SEARCH_RESULTS_LIMIT, IMAGE_UPLOAD_WORKERS, MEDIA_DELETION_BATCH_SIZE,
+    MEDIA_DELETION_TRIES, MEDIA_DELETION_RETRY_DELAY
+)
+from utils.background import detach_uploaded_file, run_in_background
+from utils.images import process_images
+from utils.storage import MediaField, get_storage
 
 logger = logging.getLogger(__name__)
 
@@ -48,19 +64,23 @@ class User(AbstractBaseUser):
     name = models.CharField(max_length=30, blank=True)
     surname = models.CharField(max_length=30, blank=True)
     bio = models.CharField(max_length=200, blank=True)
-    avatar = CloudinaryField("image", folder="avatar", null=True, blank=True)
+    avatar = MediaField("image", folder="avatar", null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     confirmed = models.BooleanField(default=False,
                                     help_text="Responsible for user email confirmation")
     following = models.ManyToManyField("self", symmetrical=False, related_name="followers")
+    followers_count = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
     USERNAME_FIELD = "email"
 
     # Variable for holding current avatar url path.
-    # Needed for avatar deletion from cloudinary, if avatar was updated.
+    # Needed for avatar deletion from media storage, if avatar was updated.
     __original_avatar = None
+    # Variable for holding current full name.
+    # Needed for invalidation of cached user post cards, if name was updated.
+    __original_full_name = None
 
     class Meta:
         db_table = "users"
@@ -68,15 +88,31 @@ class User(AbstractBaseUser):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.__original_avatar = self.avatar
+        self.__original_full_name = self._get_loaded_full_name()
 
     def save(self, force_insert=False, force_update=False, *args, **kwargs):
-        # Check if original avatar exists and is updated
-        if self.__original_avatar and self.avatar != self.__original_avatar:
-            # Delete old avatar from cloudinary
-            cloudinary.uploader.destroy(self.__original_avatar.public_id, invalidate=True)
+        adding = self._state.adding
+        # Old avatar is queued after the row is updated, so deletion
+        # started on commit doesn't see it as used by this user
+        with transaction.atomic():
+            super().save(force_insert, force_update, *args, **kwargs)
+
+            # Check if original avatar exists and is updated
+            if self.__original_avatar and self.avatar != self.__original_avatar:
+                # Delete old avatar from media storage
+                MediaDeletion.enqueue([self.__original_avatar])
+
+            # Author name is displayed in post cards
+            full_name = self._get_loaded_full_name()
+            if not adding and full_name != self.__original_full_name:
+                Post.bump_versions(user=self)
 
-        super().save(force_insert, force_update, *args, **kwargs)
         self.__original_avatar = self.avatar
+        self.__original_full_name = full_name
+
+    def _get_loaded_full_name(self) -> tuple:
+        """Returns name and surname without loading deferred fields"""
+        return self.__dict__.get("name"), self.__dict__.get("surname")
 
     def __str__(self):
         return self.email
@@ -118,43 +154,195 @@ class User(AbstractBaseUser):
         """
         return all([self.name, self.surname, self.bio, self.avatar])
 
+    def fan_out_on_read(self) -> bool:
+        """
+        Checks if user posts are merged into followers feed on read
+        instead of being written to every follower timeline
+
+        Returns:
+            True if user has too many followers for fan-out on write, else False
+        """
+        return self.followers_count >= FAN_OUT_FOLLOWERS_LIMIT
+
 
 class Post(models.Model):
     """Represents 'posts' table in the database"""
+
+    class Status(models.TextChoices):
+        # Images of the post are being uploaded
+        PENDING = "pending"
+        READY = "ready"
+
     content = models.CharField(max_length=150, default="")
     created_at = models.DateTimeField(default=timezone.now)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     likes = models.ManyToManyField(User, related_name="+")
-    tags = TaggableManager(blank=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    tags = TaggableManager(blank=True, through="TaggedPost")
+    # Incremented on every change of data displayed in post card,
+    # used as a part of post card cache key
+    version = models.PositiveIntegerField(default=1)
+    # Time of the last version change, used for conditional requests of the feed
+    updated_at = models.DateTimeField(auto_now=True)
+    # Lexemes of the content, kept in sync by database trigger and
+    # searched by GIN index (both exist only in PostgreSQL)
+    search_vector = SearchVectorField(null=True, editable=False)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.READY)
 
     class Meta:
         db_table = "posts"
         ordering = ["-created_at"]
+        # Indexes for cursor pagination of the feed and user posts
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="posts_created_at_id_idx"),
+            models.Index(fields=["user", "-created_at", "-id"], name="posts_user_created_at_id_idx"),
+        ]
 
     def __str__(self):
         return self.content
 
+    def is_pending(self) -> bool:
+        """Returns True if images of the post are being uploaded"""
+        return self.status == Post.Status.PENDING
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not adding:
+            self.version = F("version") + 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version", "updated_at"}
+
+        super().save(*args, **kwargs)
+
+        if not adding:
+            self.refresh_from_db(fields=["version"])
+
     @classmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
-    def get_post(cls, post_id: int):
-        """Get post by id
+    def bump_versions(cls, **filters):
+        """Increments version of the posts, so their cached cards are not used anymore
+
+        Args:
+            filters: lookups of the posts which data was changed
+        """
+        Post.objects.filter(**filters).update(**Post.get_version_changes())
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def resolve_stale_pending(cls, older_than: datetime) -> int:
+        """
+        Marks posts which are pending since before the time as ready,
+        with images uploaded so far
+
+        Upload task runs in process memory, so it is lost if the process
+        is restarted before it finishes.
+
+        Args:
+            older_than: posts created before this time are resolved
+
+        Returns:
+            Number of resolved posts
+        """
+        return Post.objects.filter(status=Post.Status.PENDING, created_at__lt=older_than).update(
+            status=Post.Status.READY, **Post.get_version_changes())
+
+    @staticmethod
+    def get_version_changes() -> dict:
+        """Returns field values for update() that change post version"""
+        return {"version": F("version") + 1, "updated_at": timezone.now()}
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def get_post(cls, post_id: int, user: User = None):
+        """Get post by id with its author, tags and images
 
         Args:
             post_id: post id
+            user: User object, viewer of the post
         """
-        return Post.objects.prefetch_related("tags", "images", "images__likes").get(id=post_id)
+        return cls.get_posts_with_details(user).get(id=post_id)
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def get_posts_with_details(cls, user: User = None):
+        """Get posts queryset that loads author, tags and images of the post
+
+        Post is loaded with three queries: post with author, tags and images.
+        If user is given, post and its images are annotated with 'liked'
+        flag, which is True if the user likes the object.
+
+        Args:
+            user: User object, viewer of the post
+        """
+        posts = Post.objects.select_related("user").prefetch_related("tags")
+        images = Image.objects.order_by("id")
+        if user:
+            posts = posts.annotate(
+                liked=Exists(Post.likes.through.objects.filter(post=OuterRef("pk"), user=user))
+            )
+            images = images.annotate(
+                liked=Exists(Image.likes.through.objects.filter(image=OuterRef("pk"), user=user))
+            )
+        return posts.prefetch_related(Prefetch("images", queryset=images))
 
     @classmethod
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
     def get_posts(cls, user: User = None):
         """Get all posts of specific user
 
+        Posts are annotated with cover image, so page of posts
+        is loaded with fixed number of queries. 'search_vector' is
+        never displayed, so it is not loaded.
+
         Args:
             user: User object
         """
+        # First image of the post is used as a cover in the feed
+        cover_image = Image.objects.filter(post=OuterRef("pk")).order_by("id").values("image")[:1]
+
+        posts = Post.objects.select_related("user").prefetch_related("tags").defer("search_vector").annotate(
+            cover_image=Subquery(cover_image, output_field=MediaField())
+        )
         if user:
-            return Post.objects.prefetch_related("tags", "images", "user", "likes").filter(user=user)
-        return Post.objects.prefetch_related("tags", "images", "user", "likes").all()
+            return posts.filter(user=user)
+        return posts.all()
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def get_tag_posts(cls, tag: Tag):
+        """Get all posts with specific tag
+
+        Posts are annotated with the keys of 'tagged_posts' table,
+        so page of posts is selected by its (tag, created_at) index.
+
+        Args:
+            tag: Tag object
+        """
+        return cls.get_posts().filter(tagged_posts__tag=tag).annotate(
+            feed_created_at=F("tagged_posts__created_at"),
+            feed_id=F("tagged_posts__content_object_id")
+        )
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def search_posts(cls, query: str):
+        """Get posts matching search query, most relevant first
+
+        In PostgreSQL posts are matched by 'search_vector' GIN index,
+        other databases (SQLite in tests) fall back to substring search.
+
+        Args:
+            query: search query in web search engines syntax
+        """
+        posts = cls.get_posts()
+        if connection.vendor == "postgresql":
+            search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+            posts = posts.filter(search_vector=search_query).annotate(
+                rank=SearchRank(F("search_vector"), search_query)
+            ).order_by("-rank", "-created_at", "-id")
+        else:
+            posts = posts.filter(content__icontains=query).order_by("-created_at", "-id")
+        return posts[:SEARCH_RESULTS_LIMIT]
 
     @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
     def get_post_images(self):
@@ -164,9 +352,10 @@ class Post(models.Model):
 
 class Image(models.Model):
     """Represents 'images' table in the database"""
-    image = CloudinaryField("image", folder="posts", null=True, blank=True)
+    image = MediaField("image", folder="posts", null=True, blank=True)
     post = models.ForeignKey(Post, related_name="images", on_delete=models.CASCADE)
     likes = models.ManyToManyField(User, related_name="+")
+    likes_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "images"
@@ -186,3 +375,327 @@ class Image(models.Model):
         if images:
             for image in images:
                 Image.objects.create(post=post, image=image)
+
+    @classmethod
+    def create_images_in_background(cls, post: Post, images: list):
+        """Uploads images of pending post in background
+
+        Uploaded files are saved to temporary files, so they outlive
+        the request. Upload starts after post creation is committed.
+
+        Args:
+            post: post object with pending status
+            images: list of uploaded files
+        """
+        paths = [detach_uploaded_file(image) for image in images]
+        run_in_background(cls.upload_images, post.id, paths)
+
+    @classmethod
+    def upload_images(cls, post_id: int, paths: list):
+        """
+        Downscales images, uploads them concurrently, creates image rows
+        and marks post as ready
+
+        Images that failed to upload are skipped. Images are created in the
+        order of the files, so the first file stays the cover of the post.
+
+        Args:
+            post_id: post id
+            paths: paths of temporary image files, files are deleted
+        """
+        field = cls._meta.get_field("image")
+
+        def upload(path: str):
+            image = Image(post_id=post_id)
+            try:
+                with open(path, "rb") as file:
+                    image.image = UploadedFile(file, name=os.path.basename(path))
+                    field.pre_save(image, add=True)
+                return image
+            except (CloudinaryError, OSError):
+                logger.exception(f"Could not upload image {path} of the post {post_id}")
+                return None
+            finally:
+                os.remove(path)
+
+        try:
+            # Files are renamed to the extension of re-encoded format
+            paths = process_images(paths)
+            with ThreadPoolExecutor(max_workers=IMAGE_UPLOAD_WORKERS) as executor:
+                images = [image for image in executor.map(upload, paths) if image is not None]
+
+            try:
+                Image.objects.bulk_create(images)
+            except IntegrityError:
+                # Post was deleted while images were uploaded
+                MediaDeletion.enqueue([image.image for image in images])
+        finally:
+            # Files are left if processing or upload failed before they were deleted
+            for path in paths:
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+            # Post is never left pending, images uploaded so far are shown
+            Post.objects.filter(id=post_id).update(status=Post.Status.READY, **Post.get_version_changes())
+
+
+class Timeline(models.Model):
+    """
+    Represents 'timelines' table in the database
+
+    Holds precomputed "following" feed: one row per post for the post
+    author and every follower of the author. Posts of users with a lot of
+    followers are not stored here, they are merged into the feed on read.
+    """
+    owner = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name="timelines", on_delete=models.CASCADE)
+    # Copy of post creation time, so that timeline is ordered by its own index
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "timelines"
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "post"], name="timelines_owner_post_unique")
+        ]
+        indexes = [
+            models.Index(fields=["owner", "-created_at", "-post"], name="timelines_owner_created_at_idx")
+        ]
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def add_author_post(cls, post: Post):
+        """Writes new post to the author timeline, so author sees it right after creation
+
+        Args:
+            post: created post
+        """
+        Timeline.objects.bulk_create([Timeline(owner_id=post.user_id, post=post, created_at=post.created_at)],
+                                     ignore_conflicts=True)
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def fan_out_post(cls, post_id: int):
+        """Writes new post to timelines of the author followers, runs in background
+
+        Followers are skipped if author posts are merged on read.
+
+        Args:
+            post_id: id of created post
+        """
+        # Post may be deleted before the task starts
+        post = Post.objects.select_related("user").filter(id=post_id).first()
+        if post is None or post.user.fan_out_on_read():
+            return
+
+        follower_ids = User.following.through.objects.filter(
+            to_user_id=post.user_id
+        ).values_list("from_user_id", flat=True)
+
+        batch = []
+        for follower_id in follower_ids.iterator(chunk_size=FAN_OUT_BATCH_SIZE):
+            batch.append(Timeline(owner_id=follower_id, post=post, created_at=post.created_at))
+            if len(batch) == FAN_OUT_BATCH_SIZE:
+                Timeline.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Timeline.objects.bulk_create(batch, ignore_conflicts=True)
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def add_user_posts(cls, owner_id: int, author: User):
+        """Adds latest posts of followed user to the owner timeline
+
+        Args:
+            owner_id: id of the timeline owner
+            author: followed user
+        """
+        if author.id != owner_id and author.fan_out_on_read():
+            return
+
+        posts = Post.objects.filter(user=author).values_list("id", "created_at")[:TIMELINE_BACKFILL_SIZE]
+        Timeline.objects.bulk_create(
+            [Timeline(owner_id=owner_id, post_id=post_id, created_at=created_at) for post_id, created_at in posts],
+            ignore_conflicts=True
+        )
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def remove_user_posts(cls, owner_id: int, author_id: int):
+        """Removes posts of unfollowed user from the owner timeline
+
+        Args:
+            owner_id: id of the timeline owner
+            author_id: id of unfollowed user
+        """
+        Timeline.objects.filter(owner_id=owner_id, post__user_id=author_id).delete()
+
+    @classmethod
+    def get_timeline_posts(cls, user: User) -> list:
+        """
+        Returns querysets with posts of the user "following" feed:
+        precomputed timeline and posts of followed users with fan-out on read.
+
+        Both querysets are annotated with 'feed_created_at' and 'feed_id'
+        fields, which are used as keys for cursor pagination.
+
+        Args:
+            user: authenticated user
+        """
+        timeline = Post.get_posts().filter(timelines__owner=user).annotate(
+            feed_created_at=F("timelines__created_at"),
+            feed_id=F("timelines__post_id")
+        )
+
+        fan_out_on_read_users = user.following.filter(
+            followers_count__gte=FAN_OUT_FOLLOWERS_LIMIT
+        ).values("id")
+        merged_on_read = Post.get_posts().filter(user__in=fan_out_on_read_users).annotate(
+            feed_created_at=F("created_at"),
+            feed_id=F("id")
+        )
+        return [timeline, merged_on_read]
+
+
+class TaggedPost(TaggedItemBase):
+    """
+    Represents 'tagged_posts' table in the database
+
+    Links tags with posts by foreign key instead of generic relation,
+    so posts with specific tag are selected by index.
+    """
+    content_object = models.ForeignKey(Post, related_name="tagged_posts", on_delete=models.CASCADE)
+    # Copy of post creation time, so that posts with the tag are ordered by index
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "tagged_posts"
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "content_object"], name="tagged_posts_tag_post_unique")
+        ]
+        indexes = [
+            models.Index(fields=["tag", "-created_at", "-content_object"], name="tagged_posts_tag_created_idx")
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.created_at is None:
+            self.created_at = self.content_object.created_at
+        super().save(*args, **kwargs)
+
+
+class TagPostsCount(models.Model):
+    """
+    Represents 'tag_posts_counts' table in the database
+
+    Holds number of posts with specific tag, updated on every
+    tag assignment and removal.
+    """
+    tag = models.OneToOneField(Tag, primary_key=True, related_name="+", on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "tag_posts_counts"
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def change_count(cls, tag_id: int, delta: int):
+        """Adds delta to the number of posts with the tag
+
+        Args:
+            tag_id: tag id
+            delta: number of added (or removed if negative) posts
+        """
+        TagPostsCount.objects.bulk_create([TagPostsCount(tag_id=tag_id)], ignore_conflicts=True)
+        TagPostsCount.objects.filter(tag_id=tag_id).update(count=Greatest(F("count") + delta, 0))
+
+    @classmethod
+    @retry(exceptions=OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    def get_count(cls, tag_id: int) -> int:
+        """Returns number of posts with the tag
+
+        Args:
+            tag_id: tag id
+        """
+        return TagPostsCount.objects.filter(tag_id=tag_id).values_list("count", flat=True).first() or 0
+
+
+class MediaDeletion(models.Model):
+    """
+    Represents 'media_deletions' table in the database
+
+    Durable queue of files that should be deleted from media storage.
+    Files are queued in the transaction that stops using them and are
+    deleted in batches after commit, so requests never wait on the storage.
+    Files that failed to delete are retried one by one with growing delay.
+    """
+    # Stored value of the media field, e.g. 'image/upload/v1/avatar/abc.jpg'
+    resource = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "media_deletions"
+        indexes = [
+            models.Index(fields=["next_attempt_at"], name="media_deletions_next_idx")
+        ]
+
+    def __str__(self):
+        return self.resource
+
+    @classmethod
+    def enqueue(cls, resources: list):
+        """Queues files for deletion and starts deletion after commit
+
+        Args:
+            resources: stored resources or their stored values, empty values are skipped
+        """
+        field = User._meta.get_field("avatar")
+        deletions = [cls(resource=field.get_prep_value(resource)) for resource in resources if resource]
+        if deletions:
+            cls.objects.bulk_create(deletions)
+            run_in_background(cls.delete_queued)
+
+    @classmethod
+    def delete_queued(cls) -> int:
+        """
+        Deletes queued files which are due, batch by batch
+
+        Files still used by users or images are not deleted (local storage
+        keeps the same file once for all its uploads), they are just
+        dropped from the queue.
+
+        Returns:
+            Number of processed queue rows
+        """
+        field = User._meta.get_field("avatar")
+        storage = get_storage()
+        processed = 0
+        while True:
+            with transaction.atomic():
+                # Rows locked by concurrent worker are skipped
+                deletions = list(cls.objects.select_for_update(skip_locked=True).filter(
+                    next_attempt_at__lte=timezone.now()
+                ).order_by("next_attempt_at", "id")[:MEDIA_DELETION_BATCH_SIZE])
+                if not deletions:
+                    return processed
+
+                values = {deletion.resource for deletion in deletions}
+                used = {resource.get_prep_value() for resource in [
+                    *User.objects.filter(avatar__in=values).values_list("avatar", flat=True),
+                    *Image.objects.filter(image__in=values).values_list("image", flat=True),
+                ]}
+                resources = {value: field.to_python(value) for value in values - used}
+                failed = {resource.get_prep_value() for resource in storage.delete(list(resources.values()))}
+
+                finished = []
+                for deletion in deletions:
+                    if deletion.resource not in failed:
+                        finished.append(deletion.id)
+                    elif deletion.attempts + 1 >= MEDIA_DELETION_TRIES:
+                        logger.error(f"Could not delete {deletion.resource} from media storage")
+                        finished.append(deletion.id)
+                    else:
+                        deletion.attempts += 1
+                        deletion.next_attempt_at = timezone.now() + timedelta(
+                            seconds=MEDIA_DELETION_RETRY_DELAY * 2 ** (deletion.attempts - 1))
+                        deletion.save(update_fields=["attempts", "next_attempt_at"])
+                cls.objects.filter(id__in=finished).delete()
+                processed += len(deletions)
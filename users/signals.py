@@ -1,21 +1,101 @@
-from typing import Type
+from typing import Optional, Type
 
-import cloudinary.uploader
-from django.db.models.signals import pre_delete
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 
 
-from users.models import User
+from users.models import User, MediaDeletion
 
 
 @receiver(pre_delete, sender=User)
 def delete_avatar(sender: Type[User], instance: User, **kwargs):
     """
-    Delete avatar from cloudinary before user deletion
+    Queue avatar for deletion from media storage before user deletion
 
     Args:
         sender: User model
         instance: user instance
     """
+    MediaDeletion.enqueue([instance.avatar])
 
-    cloudinary.uploader.destroy(instance.avatar.public_id, invalidate=True)
\ No newline at end of file
+
+@receiver(m2m_changed, sender=User.following.through)
+def update_followers_count(instance: User, action: str, reverse: bool, pk_set: set, **kwargs):
+    """
+    Keeps denormalized followers count up to date when user
+    follows or unfollows other users
+
+    Only rows which are actually removed are counted, so they are
+    selected before removal and clear.
+
+    Args:
+        instance: user whose 'following' (or 'followers' if reverse) is changed
+        action: type of the update
+        reverse: True if relation is changed from 'followers' side
+        pk_set: ids of added or removed users, None for clear
+    """
+    if action in ("pre_remove", "pre_clear"):
+        instance._removed_follows = get_follows_counts(instance, reverse, pk_set)
+    elif action in ("post_remove", "post_clear"):
+        change_followers_count(instance.__dict__.pop("_removed_follows", {}), -1)
+    elif action == "post_add" and pk_set:
+        # pk_set of 'post_add' has only ids of inserted rows
+        change_followers_count({instance.id: len(pk_set)} if reverse else dict.fromkeys(pk_set, 1), 1)
+
+
+@receiver(pre_delete, sender=User)
+def collect_deleted_follows(sender: Type[User], instance: User, **kwargs):
+    """
+    Remembers users followed by deleted user, as follows are deleted
+    by cascade without m2m_changed signal
+
+    Args:
+        sender: User model
+        instance: user instance
+    """
+    instance._removed_follows = get_follows_counts(instance, reverse=False, pk_set=None)
+
+
+@receiver(post_delete, sender=User)
+def update_deleted_followers_count(sender: Type[User], instance: User, **kwargs):
+    """
+    Decrements followers count of users followed by deleted user
+
+    Args:
+        sender: User model
+        instance: user instance
+    """
+    change_followers_count(instance.__dict__.pop("_removed_follows", {}), -1)
+
+
+def get_follows_counts(instance: User, reverse: bool, pk_set: Optional[set]) -> dict:
+    """Returns {followed user id: number of follows} of existing follows among changed ones
+
+    Args:
+        instance: user whose 'following' (or 'followers' if reverse) is changed
+        reverse: True if relation is changed from 'followers' side
+        pk_set: ids of changed users, None for all
+    """
+    follows = User.following.through.objects.filter(**{"to_user_id" if reverse else "from_user_id": instance.id})
+    if pk_set is not None:
+        follows = follows.filter(**{"from_user_id__in" if reverse else "to_user_id__in": pk_set})
+    return dict(follows.order_by().values("to_user_id").annotate(count=Count("*")).values_list("to_user_id", "count"))
+
+
+def change_followers_count(follows_counts: dict, sign: int):
+    """Adds (or subtracts if sign is negative) numbers of follows to followers counts
+
+    Users with the same change are updated with one statement.
+
+    Args:
+        follows_counts: {followed user id: number of added or removed follows}
+        sign: 1 for added follows, -1 for removed
+    """
+    user_ids_by_delta = {}
+    for user_id, count in follows_counts.items():
+        user_ids_by_delta.setdefault(count, []).append(user_id)
+
+    for delta, user_ids in user_ids_by_delta.items():
+        User.objects.filter(id__in=user_ids).update(followers_count=Greatest(F("followers_count") + sign * delta, 0))
@@ -1,9 +1,24 @@
-from django.test import TestCase
+import os
+from unittest import skipUnless
+from unittest.mock import patch
+
+from PIL import Image as PillowImage
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 
 from parameterized import parameterized
 
-from test_utils.utils import TEST_PASSWORD, create_test_user_without_data, create_test_user, create_test_users
-from users.models import User, Post, Image
+from db.scripts.helper_functions import like_unlike_object
+from test_utils.utils import (
+    TEST_PASSWORD, create_test_user_without_data, create_test_user, create_test_users,
+    create_test_image, use_temporary_media_storage
+)
+from users.models import User, Post, Image, Timeline, TagPostsCount, MediaDeletion
+from utils.background import detach_uploaded_file
+from utils.constants import CLOUDINARY_STORAGE
+from utils.images import process_images
+from utils.storage import get_storage
 
 
 class UserModelTest(TestCase):
@@ -140,6 +155,24 @@ class PostModelTest(TestCase):
         post = Post.get_post(post_id=self.post.id)
         self.assertEqual(self.post, post)
 
+    def test_get_post_with_like_state(self):
+        """Test that get_post loads post, images and like state with fixed number of queries"""
+        image = Image.objects.create(post=self.post, image="first.jpg")
+        Image.objects.create(post=self.post, image="second.jpg")
+        like_unlike_object(self.post, self.user2)
+        like_unlike_object(image, self.user2)
+
+        # One query for post with author, one for tags and one for images
+        with self.assertNumQueries(3):
+            post = Post.get_post(post_id=self.post.id, user=self.user2)
+            post.user.get_full_name()
+            list(post.tags.all())
+            images = list(post.images.all())
+
+        self.assertTrue(post.liked)
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual([(image.liked, image.likes_count) for image in images], [(True, 1), (False, 0)])
+
     def test_get_posts_with_specific_user_argument(self):
         """Test get_posts method"""
         posts = Post.get_posts(user=self.user)
@@ -150,6 +183,111 @@ class PostModelTest(TestCase):
         posts = Post.get_posts()
         self.assertEqual(posts.count(), 2)
 
+    def test_get_posts_defers_search_vector(self):
+        """Test that feed posts are loaded without search vector"""
+        self.assertIn("search_vector", Post.get_posts().first().get_deferred_fields())
+
+    def test_get_posts_number_of_queries(self):
+        """Test that get_posts loads posts with fixed number of queries"""
+        Image.objects.create(post=self.post, image="first.jpg")
+        Image.objects.create(post=self.post, image="second.jpg")
+        like_unlike_object(self.post, self.user)
+        like_unlike_object(self.post, self.user2)
+        self.post.tags.add("first", "second")
+
+        # One query for posts and one for tags
+        with self.assertNumQueries(2):
+            posts = {post.id: post for post in Post.get_posts()}
+            for post in posts.values():
+                post.user.get_full_name()
+                list(post.tags.all())
+
+        self.assertEqual(posts[self.post.id].likes_count, 2)
+        self.assertEqual(posts[self.post.id].cover_image.public_id, "first")
+        self.assertEqual(posts[self.post2.id].likes_count, 0)
+        self.assertIsNone(posts[self.post2.id].cover_image)
+
+    def test_version_is_changed_with_post_card_data(self):
+        """Test that post version is changed when data displayed in post card changes"""
+        post = Post.objects.create(content="Post", user=self.user)
+        self.assertEqual(post.version, 1)
+
+        post.content = "Updated post"
+        post.save()
+        self.assertEqual(post.version, 2)
+
+        post.tags.add("tag")
+        Image.objects.create(post=post, image="test.jpg")
+        like_unlike_object(post, self.user2)
+        post.refresh_from_db()
+        self.assertEqual(post.version, 5)
+
+        # Author name is displayed in post card
+        self.user.name = "New name"
+        self.user.save()
+        post.refresh_from_db()
+        self.assertEqual(post.version, 6)
+
+    def test_tag_posts_count(self):
+        """Test that number of posts with the tag is updated on tag assignment and removal"""
+        self.post.tags.add("tag")
+        self.post2.tags.add("tag")
+        tag = self.post.tags.get()
+        self.assertEqual(TagPostsCount.get_count(tag.id), 2)
+        self.assertEqual(set(Post.get_tag_posts(tag)), {self.post, self.post2})
+
+        self.post.tags.remove("tag")
+        self.post2.delete()
+        self.assertEqual(TagPostsCount.get_count(tag.id), 0)
+        self.assertFalse(Post.get_tag_posts(tag).exists())
+
+
+@skipUnless(connection.vendor == "postgresql", "Like is toggled by single statement in PostgreSQL only")
+class ToggleLikeStatementTest(TestCase):
+    """Class for testing like toggled by single statement"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create users, post and image"""
+        cls.user, cls.user2 = create_test_users()
+        cls.post = Post.objects.create(content="First post", user=cls.user)
+        cls.image = Image.objects.create(post=cls.post, image="first.jpg")
+
+    def assert_post_state(self, liked: bool, likes_count: int, version: int):
+        """Asserts like row, likes count and version of the post"""
+        self.post.refresh_from_db(fields=["likes_count", "version"])
+        self.assertEqual(self.post.likes.filter(id=self.user2.id).exists(), liked)
+        self.assertEqual(self.post.likes_count, likes_count)
+        self.assertEqual(self.post.version, version)
+
+    def test_like_unlike_and_like_again(self):
+        """Test that every toggle flips the like and changes count and version of the post"""
+        version = self.post.version
+
+        self.assertTrue(like_unlike_object(self.post, self.user2))
+        self.assert_post_state(liked=True, likes_count=1, version=version + 1)
+
+        self.assertFalse(like_unlike_object(self.post, self.user2))
+        self.assert_post_state(liked=False, likes_count=0, version=version + 2)
+
+        self.assertTrue(like_unlike_object(self.post, self.user2))
+        self.assert_post_state(liked=True, likes_count=1, version=version + 3)
+
+    def test_image_like_is_toggled(self):
+        """Test that image like is toggled without post version"""
+        self.assertTrue(like_unlike_object(self.image, self.user2))
+        self.assertEqual(self.image.likes_count, 1)
+        self.assertFalse(like_unlike_object(self.image, self.user2))
+        self.image.refresh_from_db(fields=["likes_count"])
+        self.assertEqual(self.image.likes_count, 0)
+
+    def test_drifted_count_is_not_negative(self):
+        """Test that unlike of the object with drifted zero count keeps count at zero"""
+        self.post.likes.add(self.user2)
+
+        self.assertFalse(like_unlike_object(self.post, self.user2))
+        self.assertEqual(self.post.likes_count, 0)
+
 
 class ImageModelTest(TestCase):
     """Class for testing the Image model"""
@@ -184,4 +322,175 @@ class ImageModelTest(TestCase):
         Image.create_images(self.post, images=images)
         self.assertEqual(self.post.images.count(), 3)
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_processed_images_are_renamed_to_written_format(self):
+        """Test that opaque image uploaded as PNG is re-encoded to JPEG with matching extension"""
+        path = detach_uploaded_file(create_test_image("test.png"))
+        processed_path = process_images([path])[0]
+        self.addCleanup(os.remove, processed_path)
+
+        self.assertTrue(processed_path.endswith(".jpg"))
+        self.assertFalse(os.path.exists(path))
+        with PillowImage.open(processed_path) as image:
+            self.assertEqual(image.format, "JPEG")
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    @patch("users.models.process_images", side_effect=RuntimeError)
+    def test_upload_images_failure_finishes_post(self, _):
+        """Test that files are removed and post is not left pending when processing fails"""
+        post = Post.objects.create(content="Pending post", user=self.user, status=Post.Status.PENDING)
+        path = detach_uploaded_file(create_test_image("test.png"))
+
+        with self.assertRaises(RuntimeError):
+            Image.upload_images(post.id, [path])
+
+        post.refresh_from_db()
+        self.assertEqual(post.status, Post.Status.READY)
+        self.assertFalse(os.path.exists(path))
+
+
+class TimelineModelTest(TestCase):
+    """Class for testing the Timeline model"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create users, user1 follows user2"""
+        cls.user1, cls.user2 = create_test_users()
+        cls.user1.following.add(cls.user2)
+
+    def get_timeline_post_ids(self, user: User) -> set:
+        """Returns ids of posts from user 'following' feed"""
+        return {post.id for queryset in Timeline.get_timeline_posts(user) for post in queryset}
+
+    def test_followers_count(self):
+        """Test that followers count is updated on follow/unfollow"""
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user2.followers_count, 1)
+
+        self.user1.following.remove(self.user2)
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user2.followers_count, 0)
+
+    def test_followers_count_ignores_missing_follows(self):
+        """Test that removing user who doesn't follow doesn't change followers count"""
+        user3 = User.objects.create_user(email="user3@email.com", password=TEST_PASSWORD)
+        self.user2.followers.add(user3)
+        self.user2.followers.remove(self.user1, self.user2)
+        self.user1.following.remove(self.user2)
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user2.followers_count, 1)
+
+    def test_followers_count_after_clear(self):
+        """Test that followers count is updated when following or followers are cleared"""
+        self.user1.following.clear()
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user2.followers_count, 0)
+
+        self.user2.followers.add(self.user1)
+        self.user2.followers.clear()
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user2.followers_count, 0)
+
+    def test_followers_count_after_follower_deletion(self):
+        """Test that followers count is decremented when follower is deleted"""
+        self.user1.delete()
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user2.followers_count, 0)
+
+    def test_post_is_written_to_followers_timeline(self):
+        """Test that new post is added to timelines of author and, after commit, of followers"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            post = Post.objects.create(user=self.user2, content="New post")
+        self.assertTrue(Timeline.objects.filter(owner=self.user2, post=post).exists())
+        self.assertFalse(Timeline.objects.filter(owner=self.user1, post=post).exists())
+
+        with override_settings(BACKGROUND_TASKS_EAGER=True):
+            for callback in callbacks:
+                callback()
+        self.assertTrue(Timeline.objects.filter(owner=self.user1, post=post).exists())
+        self.assertEqual(self.get_timeline_post_ids(self.user1), {post.id})
+
+    def test_follow_and_unfollow_update_timeline(self):
+        """Test that posts of followed user are added and removed from timeline"""
+        post = Post.objects.create(user=self.user1, content="New post")
+        self.assertFalse(Timeline.objects.filter(owner=self.user2, post=post).exists())
+
+        self.user2.following.add(self.user1)
+        self.assertEqual(self.get_timeline_post_ids(self.user2), {post.id})
+
+        self.user2.following.remove(self.user1)
+        self.assertEqual(self.get_timeline_post_ids(self.user2), set())
+
+    @patch("users.models.FAN_OUT_FOLLOWERS_LIMIT", 1)
+    def test_posts_merged_on_read(self):
+        """Test that posts of users with a lot of followers are merged on read"""
+        self.user2.refresh_from_db()
+        post = Post.objects.create(user=self.user2, content="New post")
+
+        self.assertFalse(Timeline.objects.filter(owner=self.user1, post=post).exists())
+        self.assertEqual(self.get_timeline_post_ids(self.user1), {post.id})
+
+
+class MediaDeletionModelTest(TestCase):
+    """Class for testing the MediaDeletion model"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_test_user_without_data()
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_old_avatar_is_deleted_after_commit(self):
+        """Test that replaced avatar is queued and deleted from storage after commit"""
+        use_temporary_media_storage(self)
+        self.user.avatar = create_test_image("first.png")
+        self.user.save()
+        old_avatar_path = get_storage().get_path(self.user.avatar)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.avatar = create_test_image("second.png", (20, 20))
+            self.user.save()
+        self.assertTrue(old_avatar_path.exists())
+        self.assertEqual(MediaDeletion.objects.count(), 1)
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(old_avatar_path.exists())
+        self.assertTrue(get_storage().get_path(self.user.avatar).exists())
+        self.assertFalse(MediaDeletion.objects.exists())
+
+    @override_settings(MEDIA_STORAGE=CLOUDINARY_STORAGE)
+    @patch("cloudinary.api.delete_resources")
+    def test_deletions_are_batched_and_retried(self, delete_resources):
+        """Test that files are deleted in batches and only failed files are retried"""
+        delete_resources.side_effect = lambda public_ids, **kwargs: {
+            "deleted": {public_id: "error" if public_id == "image/7" else "deleted" for public_id in public_ids}
+        }
+        MediaDeletion.objects.bulk_create(
+            [MediaDeletion(resource=f"image/upload/v1/image/{number}.jpg") for number in range(150)]
+        )
+
+        self.assertEqual(MediaDeletion.delete_queued(), 150)
+        self.assertEqual([len(call.args[0]) for call in delete_resources.call_args_list], [100, 50])
+        failed = MediaDeletion.objects.get()
+        self.assertEqual((failed.resource, failed.attempts), ("image/upload/v1/image/7.jpg", 1))
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+
+
+class MediaDeletionTransactionTest(TransactionTestCase):
+    """Class for testing media deletion in autocommit mode"""
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_old_avatar_is_deleted_in_autocommit(self):
+        """Test that replaced avatar is deleted when the user is saved outside of transaction"""
+        use_temporary_media_storage(self)
+        user = create_test_user_without_data()
+        user.avatar = create_test_image("first.png")
+        user.save()
+        old_avatar_path = get_storage().get_path(user.avatar)
+
+        user.avatar = create_test_image("second.png", (20, 20))
+        user.save()
+
+        self.assertFalse(old_avatar_path.exists())
+        self.assertTrue(get_storage().get_path(user.avatar).exists())
+        self.assertFalse(MediaDeletion.objects.exists())
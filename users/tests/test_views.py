@@ -1,10 +1,15 @@
+from PIL import Image as PillowImage
 from django.contrib.messages import get_messages
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
-from test_utils.utils import create_test_users, create_test_user_without_data, TEST_PASSWORD, create_test_user
+from test_utils.utils import (
+    create_test_users, create_test_user_without_data, TEST_PASSWORD, create_test_user,
+    create_test_image, use_temporary_media_storage
+)
 from users.constants import USER_UPDATED_MSG, USER_DELETED_MSG
 from users.models import User
+from utils.storage import get_storage
 
 
 class GetProfileViewTest(TestCase):
@@ -92,6 +97,21 @@ class UpdateProfileViewTest(TestCase):
         self.assertEqual(self.user.surname, "La")
         self.assertEqual(self.user.bio, "Test bio")
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_avatar_is_downscaled(self):
+        """Ensure that avatar is downscaled and stripped of EXIF before upload"""
+        use_temporary_media_storage(self)
+        exif = PillowImage.Exif()
+        exif[0x010F] = "Camera"
+        self.client.post(f"/profile/{self.user.id}/update",
+                         data={"name": "Lana", "surname": "La", "bio": "Test bio",
+                               "avatar": create_test_image("avatar.jpg", (4000, 1000), exif)})
+
+        self.user.refresh_from_db()
+        avatar = PillowImage.open(get_storage().get_path(self.user.avatar))
+        self.assertEqual(avatar.size, (2048, 512))
+        self.assertNotIn("exif", avatar.info)
+
 
 class DeleteProfileViewTest(TestCase):
     """Tests for DeleteProfileView"""
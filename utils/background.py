@@ -0,0 +1,78 @@
+"""Module for running tasks outside of the request"""
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Returns thread pool of the process, creates it on first call"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.BACKGROUND_WORKERS,
+                                       thread_name_prefix="background")
+    return _executor
+
+
+def _run_task(func: Callable, *args, **kwargs):
+    """Runs task, logs its errors and closes database connections of the thread"""
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background task {func.__qualname__} failed")
+    finally:
+        if not settings.BACKGROUND_TASKS_EAGER:
+            connections.close_all()
+
+
+def run_in_background(func: Callable, *args, **kwargs):
+    """Runs function in background thread after current transaction is committed
+
+    Task is not started if transaction is rolled back, so it never
+    sees rows that don't exist.
+
+    Args:
+        func: task function
+        args: positional arguments of the function
+        kwargs: keyword arguments of the function
+    """
+    def submit():
+        if settings.BACKGROUND_TASKS_EAGER:
+            _run_task(func, *args, **kwargs)
+        else:
+            _get_executor().submit(_run_task, func, *args, **kwargs)
+
+    transaction.on_commit(submit)
+
+
+def detach_uploaded_file(file: UploadedFile) -> str:
+    """
+    Saves uploaded file to temporary file that outlives the request,
+    the caller is responsible for deleting it
+
+    Args:
+        file: file uploaded with the request
+
+    Returns:
+        Path of the temporary file
+    """
+    suffix = os.path.splitext(file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as detached_file:
+        if hasattr(file, "temporary_file_path"):
+            # Large upload is already on disk, it is moved instead of copied
+            detached_file.close()
+            shutil.move(file.temporary_file_path(), detached_file.name)
+        else:
+            for chunk in file.chunks():
+                detached_file.write(chunk)
+    return detached_file.name
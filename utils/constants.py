@@ -0,0 +1,34 @@
+"""Module for constants used in project utilities"""
+
+# Cursor pagination
+CURSOR = "cursor"
+CURSOR_NEXT = "n"
+CURSOR_PREVIOUS = "p"
+DEFAULT_CURSOR_KEYS = ("created_at", "id")
+
+# Request attribute with identity map of loaded objects
+IDENTITY_MAP_ATTRIBUTE = "_identity_map"
+
+# Image preprocessing
+# Larger side of uploaded image is reduced to this size
+IMAGE_MAX_SIZE = 2048
+IMAGE_JPEG_QUALITY = 85
+
+# Media storages (MEDIA_STORAGE setting values)
+CLOUDINARY_STORAGE = "cloudinary"
+LOCAL_STORAGE = "local"
+# Local storage folder of resized copies of the images
+DERIVATIVES_FOLDER = "derivatives"
+# Transformation options supported by local storage
+DERIVATIVE_OPTIONS = ("width", "height", "crop", "background")
+# Format of stored file without extension
+DEFAULT_MEDIA_FORMAT = "bin"
+# Extensions of image formats which differ from format name
+IMAGE_FORMAT_EXTENSIONS = {"jpeg": "jpg"}
+# Maximum number of public ids in one Cloudinary delete_resources call
+CLOUDINARY_DELETE_BATCH_SIZE = 100
+# Statuses of resources in delete_resources response which are not retried
+CLOUDINARY_DELETED_STATUSES = ("deleted", "not_found")
+
+# Error messages
+INVALID_CURSOR_MSG = "Invalid cursor: {}"
@@ -0,0 +1,47 @@
+"""Module for request-scoped identity map of loaded objects"""
+from typing import Optional, Type
+
+from django.db.models import Model
+from django.http import HttpRequest
+
+from utils.constants import IDENTITY_MAP_ATTRIBUTE
+
+
+class IdentityMap:
+    """
+    Keeps model instances loaded during the request, so the same row
+    is not fetched again, e.g. by permission check and by the view
+    """
+
+    def __init__(self):
+        self._objects = {}
+
+    def add(self, obj: Model):
+        """Stores loaded object
+
+        Args:
+            obj: model instance
+        """
+        self._objects[(type(obj), obj.pk)] = obj
+
+    def get(self, model: Type[Model], pk) -> Optional[Model]:
+        """Returns stored object, None if object was not loaded
+
+        Args:
+            model: model class
+            pk: primary key of the object
+        """
+        return self._objects.get((model, pk))
+
+
+def get_identity_map(request: HttpRequest) -> IdentityMap:
+    """Returns identity map of the request, creates it on first call
+
+    Args:
+        request: current request
+    """
+    identity_map = getattr(request, IDENTITY_MAP_ATTRIBUTE, None)
+    if identity_map is None:
+        identity_map = IdentityMap()
+        setattr(request, IDENTITY_MAP_ATTRIBUTE, identity_map)
+    return identity_map
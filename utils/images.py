@@ -0,0 +1,119 @@
+"""Module for preprocessing images before upload"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from utils.background import detach_uploaded_file
+from utils.constants import IMAGE_MAX_SIZE, IMAGE_JPEG_QUALITY, IMAGE_FORMAT_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Returns process pool, creates it on first call
+
+    Workers are spawned, not forked, as the pool is used from threads.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def _process_image(path: str, max_size: int, quality: int) -> Optional[str]:
+    """
+    Rotates image according to EXIF orientation, reduces its size and
+    re-encodes it in place without metadata: opaque images to JPEG,
+    images with transparency to PNG.
+
+    Runs in worker process, so it doesn't use Django settings.
+
+    Args:
+        path: path of the image file
+        max_size: max size of the larger side of the image
+        quality: JPEG quality
+
+    Returns:
+        Written format, None if file is not an image
+    """
+    try:
+        with Image.open(path) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_size, max_size))
+
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                image.save(path, "PNG", optimize=True)
+                return "PNG"
+            image.convert("RGB").save(path, "JPEG", quality=quality, optimize=True, progressive=True)
+            return "JPEG"
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return None
+
+
+def _get_renamed_path(path: str, image_format: str) -> str:
+    """Returns path with extension of the image format"""
+    extension = image_format.lower()
+    return f"{os.path.splitext(path)[0]}.{IMAGE_FORMAT_EXTENSIONS.get(extension, extension)}"
+
+
+def process_images(paths: list) -> list:
+    """Downscales and re-encodes image files in place in parallel
+
+    Files are renamed to the extension of the written format. Files that
+    are not images, and all files if worker process crashed, are left unchanged.
+
+    Args:
+        paths: paths of image files
+
+    Returns:
+        Paths of the files in the same order
+    """
+    global _executor
+    args = (paths, [IMAGE_MAX_SIZE] * len(paths), [IMAGE_JPEG_QUALITY] * len(paths))
+    if settings.BACKGROUND_TASKS_EAGER:
+        results = map(_process_image, *args)
+    else:
+        try:
+            results = list(_get_executor().map(_process_image, *args))
+        except BrokenProcessPool:
+            # Worker was killed (e.g. out of memory), broken pool is replaced on next call
+            logger.exception(f"Image processing pool is broken, images {paths} are not processed")
+            _executor = None
+            return paths
+
+    processed_paths = []
+    for path, image_format in zip(paths, results):
+        if image_format is None:
+            logger.warning(f"Could not process image {path}")
+        else:
+            renamed_path = _get_renamed_path(path, image_format)
+            os.replace(path, renamed_path)
+            path = renamed_path
+        processed_paths.append(path)
+    return processed_paths
+
+
+def process_uploaded_image(file: UploadedFile) -> UploadedFile:
+    """Returns downscaled and re-encoded copy of uploaded image
+
+    Args:
+        file: image uploaded with the request
+    """
+    path = detach_uploaded_file(file)
+    try:
+        path = process_images([path])[0]
+        name = os.path.splitext(file.name)[0] + os.path.splitext(path)[1]
+        with open(path, "rb") as processed_file:
+            return SimpleUploadedFile(name, processed_file.read())
+    finally:
+        os.remove(path)
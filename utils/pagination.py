@@ -0,0 +1,169 @@
+"""Module for keyset (cursor) pagination"""
+import base64
+import binascii
+import json
+from operator import attrgetter
+from typing import Iterable, Optional, Union
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+from utils.constants import (
+    CURSOR, CURSOR_NEXT, CURSOR_PREVIOUS, DEFAULT_CURSOR_KEYS, INVALID_CURSOR_MSG
+)
+
+
+class InvalidCursor(InvalidPage):
+    """Raised when cursor can't be decoded"""
+
+
+class CursorPage:
+    """Single page of objects returned by CursorPaginator"""
+
+    def __init__(self, object_list: list, next_cursor: Optional[str], previous_cursor: Optional[str]):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginates querysets ordered descending by unique combination of fields,
+    e.g. (created_at, id).
+
+    Instead of OFFSET, page is selected with WHERE clause on the keys of
+    the last (or first) object of the previous page, so every page costs
+    the same and objects created between requests don't shift pages.
+    Total count of objects is never calculated.
+
+    Several querysets with the same keys can be paginated together, in
+    this case their pages are merged in Python.
+    """
+
+    def __init__(self,
+                 object_list: Union[QuerySet, Iterable[QuerySet]],
+                 per_page: int,
+                 keys: tuple = DEFAULT_CURSOR_KEYS):
+        self.querysets = [object_list] if isinstance(object_list, QuerySet) else list(object_list)
+        self.per_page = int(per_page)
+        self.keys = keys
+        self.get_key = attrgetter(*keys) if len(keys) > 1 else lambda obj: (attrgetter(keys[0])(obj),)
+
+    def page(self, cursor: Optional[str] = None) -> CursorPage:
+        """Returns page of objects after (or before) the cursor
+
+        Args:
+            cursor: opaque cursor from previous page, None for the first page
+        """
+        direction, values = self.decode_cursor(cursor) if cursor else (CURSOR_NEXT, None)
+        forward = direction == CURSOR_NEXT
+
+        # Merge objects from all querysets, objects with the same keys are the same objects
+        objects = {}
+        for queryset in self.querysets:
+            for obj in self._get_window(queryset, forward, values):
+                objects.setdefault(self.get_key(obj), obj)
+        object_list = [objects[key] for key in sorted(objects, reverse=forward)]
+
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not forward:
+            object_list.reverse()
+
+        next_cursor = previous_cursor = None
+        if object_list:
+            if has_more or not forward:
+                next_cursor = self.encode_cursor(CURSOR_NEXT, self.get_key(object_list[-1]))
+            if values is not None and (has_more or forward):
+                previous_cursor = self.encode_cursor(CURSOR_PREVIOUS, self.get_key(object_list[0]))
+
+        return CursorPage(object_list, next_cursor, previous_cursor)
+
+    def _get_window(self, queryset: QuerySet, forward: bool, values: Optional[list]) -> list:
+        """Returns per_page + 1 objects of queryset after (or before) keys values"""
+        if values is not None:
+            queryset = queryset.filter(self._get_keyset_filter(queryset, forward, values))
+        ordering = [f"-{key}" if forward else key for key in self.keys]
+        return list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+    def _get_keyset_filter(self, queryset: QuerySet, forward: bool, values: list) -> Q:
+        """
+        Builds filter (k1 < v1) OR (k1 = v1 AND k2 < v2) OR ...
+        for descending order, or the same with '>' for ascending
+        """
+        lookup = "lt" if forward else "gt"
+        try:
+            # to_python() raises TypeError for some values of wrong type, e.g. dict for DateTimeField
+            values = [self._get_field(queryset, key).to_python(value) for key, value in zip(self.keys, values)]
+        except (ValidationError, TypeError, ValueError) as error:
+            raise InvalidCursor(INVALID_CURSOR_MSG.format(values)) from error
+
+        keyset_filter = Q()
+        for index, key in enumerate(self.keys):
+            condition = Q(**{f"{key}__{lookup}": values[index]})
+            for previous_key, previous_value in zip(self.keys[:index], values[:index]):
+                condition &= Q(**{previous_key: previous_value})
+            keyset_filter |= condition
+        return keyset_filter
+
+    @staticmethod
+    def _get_field(queryset: QuerySet, name: str):
+        """Returns model field or output field of annotation"""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    @staticmethod
+    def encode_cursor(direction: str, values: tuple) -> str:
+        """Encodes direction and keys values to opaque url-safe string"""
+        payload = json.dumps([direction, *[value.isoformat() if hasattr(value, "isoformat") else value
+                                           for value in values]])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> tuple:
+        """Decodes cursor to direction and keys values
+
+        Raises:
+            InvalidCursor: if cursor is malformed
+        """
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            direction, *values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        except (binascii.Error, ValueError, TypeError) as error:
+            raise InvalidCursor(INVALID_CURSOR_MSG.format(cursor)) from error
+
+        if (direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or len(values) != len(self.keys)
+                or not all(isinstance(value, (str, int, float)) for value in values)):
+            raise InvalidCursor(INVALID_CURSOR_MSG.format(cursor))
+        return direction, values
+
+
+class CursorPaginationMixin:
+    """Replaces page number pagination of ListView with cursor pagination"""
+    cursor_keys = DEFAULT_CURSOR_KEYS
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate the queryset with cursor from url query parameter"""
+        paginator = CursorPaginator(queryset, page_size, keys=self.cursor_keys)
+        try:
+            page = paginator.page(self.request.GET.get(CURSOR))
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,245 @@
+"""Module for storages of uploaded media files"""
+import hashlib
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import cloudinary.api
+import cloudinary.uploader
+from cloudinary import CloudinaryResource
+from cloudinary.exceptions import Error as CloudinaryError
+from cloudinary.models import CloudinaryField
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+from utils.constants import (
+    CLOUDINARY_STORAGE, LOCAL_STORAGE, DERIVATIVES_FOLDER, DERIVATIVE_OPTIONS, DEFAULT_MEDIA_FORMAT,
+    IMAGE_FORMAT_EXTENSIONS, CLOUDINARY_DELETE_BATCH_SIZE, CLOUDINARY_DELETED_STATUSES
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MediaResource(CloudinaryResource):
+    """Stored media file, which url is built by configured storage"""
+
+    def build_url(self, **options) -> str:
+        """Returns url of the file or of its derivative
+
+        Args:
+            options: transformation options, e.g. width, height, crop
+        """
+        return get_storage().url(self, **options)
+
+
+class MediaStorage(ABC):
+    """Base class of media storages"""
+
+    @abstractmethod
+    def upload(self, file: File, folder: str) -> MediaResource:
+        """Stores file and returns stored resource
+
+        Args:
+            file: uploaded file
+            folder: folder of the resource
+        """
+
+    @abstractmethod
+    def delete(self, resources: list) -> list:
+        """Deletes stored resources and their derivatives
+
+        Args:
+            resources: list of resources
+
+        Returns:
+            Resources that could not be deleted
+        """
+
+    @abstractmethod
+    def url(self, resource: CloudinaryResource, **options) -> str:
+        """Returns url of the resource or of its derivative
+
+        Args:
+            resource: stored resource
+            options: transformation options, e.g. width, height, crop
+        """
+
+
+class CloudinaryStorage(MediaStorage):
+    """Stores files in Cloudinary, derivatives are made by Cloudinary"""
+
+    def upload(self, file: File, folder: str) -> MediaResource:
+        resource = cloudinary.uploader.upload_resource(file, folder=folder, type="upload", resource_type="image")
+        return MediaResource(resource.public_id, format=resource.format, version=resource.version,
+                             type=resource.type, resource_type=resource.resource_type)
+
+    def delete(self, resources: list) -> list:
+        # Resources are deleted with one API call per group of resources of the same type
+        groups = {}
+        for resource in resources:
+            groups.setdefault((resource.resource_type or "image", resource.type or "upload"), []).append(resource)
+
+        failed = []
+        for (resource_type, delivery_type), group in groups.items():
+            for start in range(0, len(group), CLOUDINARY_DELETE_BATCH_SIZE):
+                batch = group[start:start + CLOUDINARY_DELETE_BATCH_SIZE]
+                try:
+                    result = cloudinary.api.delete_resources([resource.public_id for resource in batch],
+                                                             resource_type=resource_type, type=delivery_type,
+                                                             invalidate=True)
+                except CloudinaryError as error:
+                    logger.warning(f"Cloudinary error: {error}")
+                    failed.extend(batch)
+                    continue
+                statuses = result.get("deleted", {})
+                failed.extend(resource for resource in batch
+                              if statuses.get(resource.public_id) not in CLOUDINARY_DELETED_STATUSES)
+        return failed
+
+    def url(self, resource: CloudinaryResource, **options) -> str:
+        return CloudinaryResource.build_url(resource, **options)
+
+
+class LocalStorage(MediaStorage):
+    """
+    Stores files in MEDIA_ROOT under content-addressed paths
+    '<folder>/<hash[:2]>/<hash>.<format>', so the same file is stored once.
+
+    Derivatives (resized copies) are made with Pillow on first request
+    of their url and stored under DERIVATIVES_FOLDER.
+    """
+
+    @property
+    def root(self) -> Path:
+        return Path(settings.MEDIA_ROOT)
+
+    def upload(self, file: File, folder: str) -> MediaResource:
+        digest = hashlib.sha256()
+        for chunk in file.chunks():
+            digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        file_format = self.get_format(file)
+        resource = MediaResource(f"{folder}/{content_hash[:2]}/{content_hash}", format=file_format,
+                                 type="upload", resource_type="image")
+
+        path = self.get_path(resource)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # File is written to temporary file first, so partially written file is never served
+            with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as stored_file:
+                for chunk in file.chunks():
+                    stored_file.write(chunk)
+            os.replace(stored_file.name, path)
+        return resource
+
+    def delete(self, resources: list) -> list:
+        failed = []
+        for resource in resources:
+            relative_path = self.get_relative_path(resource)
+            try:
+                for path in [self.root / relative_path, *self.root.glob(f"{DERIVATIVES_FOLDER}/*/{relative_path}")]:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                logger.exception(f"Could not delete {relative_path}")
+                failed.append(resource)
+        return failed
+
+    def url(self, resource: CloudinaryResource, **options) -> str:
+        options = {key: value for key, value in options.items() if key in DERIVATIVE_OPTIONS}
+        relative_path = self.get_relative_path(resource)
+        if options.get("width") and options.get("height"):
+            relative_path = self.get_derivative(resource, **options)
+        return f"{settings.MEDIA_URL}{relative_path}"
+
+    @staticmethod
+    def get_format(file: File) -> str:
+        """Returns format of the image from its content, or extension of the file"""
+        try:
+            with Image.open(file) as image:
+                file_format = image.format.lower()
+        except OSError:
+            file_format = os.path.splitext(file.name or "")[1].lstrip(".").lower()
+        file.seek(0)
+        return IMAGE_FORMAT_EXTENSIONS.get(file_format, file_format) or DEFAULT_MEDIA_FORMAT
+
+    def get_relative_path(self, resource: CloudinaryResource) -> str:
+        """Returns path of the resource relative to MEDIA_ROOT"""
+        return f"{resource.public_id}.{resource.format}" if resource.format else resource.public_id
+
+    def get_path(self, resource: CloudinaryResource) -> Path:
+        """Returns path of the resource"""
+        return self.root / self.get_relative_path(resource)
+
+    def get_derivative(self, resource: CloudinaryResource, width: int, height: int,
+                       crop: str = None, background: str = None, **options) -> str:
+        """Makes resized copy of the resource if it doesn't exist, returns its relative path
+
+        'fill' and 'thumb' crops cut image to the size (gravity is not
+        supported, image is cut around its center), 'pad' crop fits
+        image into the size and fills the rest with background color,
+        without crop image is scaled down keeping its proportions.
+        """
+        name = "_".join(f"{key}-{value}" for key, value in sorted(
+            {"w": width, "h": height, "c": crop, "b": background}.items()) if value)
+        relative_path = f"{DERIVATIVES_FOLDER}/{name}/{self.get_relative_path(resource)}"
+        path = self.root / relative_path
+        if path.exists():
+            return relative_path
+
+        try:
+            with Image.open(self.get_path(resource)) as image:
+                if crop in ("fill", "thumb"):
+                    derivative = ImageOps.fit(image, (width, height))
+                elif crop == "pad":
+                    derivative = ImageOps.pad(image, (width, height), color=background)
+                else:
+                    derivative = image.copy()
+                    derivative.thumbnail((width, height))
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Concurrent requests of the same derivative never serve partially written file
+                stored_file = tempfile.NamedTemporaryFile(dir=path.parent, delete=False)
+                try:
+                    with stored_file:
+                        derivative.save(stored_file, format=image.format)
+                    os.replace(stored_file.name, path)
+                except OSError:
+                    Path(stored_file.name).unlink(missing_ok=True)
+                    raise
+        except OSError:
+            # Original is missing or is not an image
+            logger.warning(f"Could not make derivative {relative_path}")
+            return self.get_relative_path(resource)
+        return relative_path
+
+
+STORAGES = {
+    CLOUDINARY_STORAGE: CloudinaryStorage,
+    LOCAL_STORAGE: LocalStorage,
+}
+
+
+def get_storage() -> MediaStorage:
+    """Returns storage selected by MEDIA_STORAGE setting"""
+    return STORAGES[settings.MEDIA_STORAGE]()
+
+
+class MediaField(CloudinaryField):
+    """CloudinaryField which stores uploaded files in configured media storage"""
+
+    def parse_cloudinary_resource(self, value) -> MediaResource:
+        resource = super().parse_cloudinary_resource(value)
+        return MediaResource(resource.public_id, format=resource.format, version=resource.version,
+                             type=resource.type, resource_type=resource.resource_type)
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if isinstance(value, UploadedFile):
+            value.seek(0)
+            value = get_storage().upload(value, folder=self.options.get("folder"))
+            setattr(model_instance, self.attname, value)
+        return self.get_prep_value(value)